@@ -16,8 +16,9 @@ def main():
         foundation.start_server()
 
         print("✓ Battery Monitor dashboard ready. Access via browser.")
+        battery.update()  # First tick claims the ADC and records the baseline state
         if battery.voltage_available:
-            initial_voltage = battery.get_voltage()
+            initial_voltage = battery.last_voltage
             # New: Print the initial detected power state
             initial_state = battery.power_state
             if initial_voltage:
@@ -45,9 +45,7 @@ def main():
 
         # Main loop: poll the server and allow time for requests
         while True:
-            foundation.server.poll()
-            for module in foundation.modules.values():
-                module.update()
+            foundation.poll()  # Serves requests, then updates the modules registered for polling
             time.sleep(0.1)
             gc.collect()
 
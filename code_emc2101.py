@@ -37,9 +37,7 @@ def main():
         print("--- Entering main application loop ---")
         
         while True:
-            foundation.server.poll()
-            for module in foundation.modules.values():
-                module.update()
+            foundation.poll()  # Serves requests, then updates the modules registered for polling
             time.sleep(0.1)
             gc.collect()
 
@@ -5,9 +5,11 @@ import ipaddress
 import time
 import os
 import microcontroller
-from adafruit_httpserver import Server, Request, Response
+from adafruit_httpserver import Server, Request, Response, ChunkedResponse
 import gc
+import json
 from foundation_templates import TemplateSystem
+from module_base import WicdpicoModule
 import board
 import busio
 
@@ -19,6 +21,7 @@ class Config:
     BLINK_INTERVAL = 0.25
     TIMEZONE_OFFSET_HOURS = 0 # Default to UTC
     WICDPICO_VERSION = "0.0.0" # Default version
+    I2C_FREQUENCY = 400000 # Fast mode; all current sensors support it
 
 class WicdpicoFoundation:
     def __init__(self):
@@ -27,16 +30,26 @@ class WicdpicoFoundation:
         self.server = None
         self.modules = {}
         self.module_order = [] # NEW: List to control display order
+        self.update_modules = [] # Modules polled each tick; see register_update()
+        self.update_callbacks = [] # Their bound update() methods, resolved once
         self.config_failed = False
         self.wifi_mode = "AP"
         self.templates = TemplateSystem()
         self.server_ip = None
         self.poll_error_logged = False
         
+        # Parsed before the bus is created so a bad value can't pass for an I2C failure
+        toml_i2c_freq = os.getenv("I2C_FREQUENCY")
+        if toml_i2c_freq:
+            try:
+                self.config.I2C_FREQUENCY = int(toml_i2c_freq)
+            except ValueError:
+                self.startup_print("Invalid I2C_FREQUENCY '{}', using {} Hz.".format(toml_i2c_freq, self.config.I2C_FREQUENCY))
         try:
-            self.i2c = busio.I2C(board.GP5, board.GP4)
-            self.startup_print("✓ I2C Bus initialized on GP5/GP4.")
+            self.i2c = busio.I2C(board.GP5, board.GP4, frequency=self.config.I2C_FREQUENCY)
+            self.startup_print("✓ I2C Bus initialized on GP5/GP4 at {} Hz.".format(self.config.I2C_FREQUENCY))
         except Exception as e:
+            self.i2c = None
             self.startup_print("✗ FAILED to initialize I2C bus: {}".format(e))
 
     def load_user_config(self):
@@ -166,19 +179,57 @@ class WicdpicoFoundation:
     def register_module(self, name, module):
         self.modules[name] = module
         self.module_order.append(name) # NEW: Record the registration order
+        module.status_key = name
+        # Modules that keep the base class's no-op update() are never polled
+        if hasattr(module, 'update') and type(module).update is not WicdpicoModule.update:
+            self.register_update(module)
         if hasattr(module, 'register_routes'):
             module.register_routes(self.server)
 
+    def register_update(self, module):
+        """Add a module to the per-tick update() poll. Safe to call repeatedly."""
+        if module not in self.update_modules:
+            self.update_modules.append(module)
+            self.update_callbacks = [m.update for m in self.update_modules]
+
+    def unregister_update(self, module):
+        """Stop polling a module's update() until it registers again."""
+        if module in self.update_modules:
+            self.update_modules.remove(module)
+            self.update_callbacks = [m.update for m in self.update_modules]
+
     def start_server(self):
         @self.server.route("/", methods=['GET'])
         def root_route(request: Request):
             try:
-                html_content = self.render_dashboard()
-                return Response(request, html_content, content_type="text/html")
+                # Stream page head, each module card and tail as separate chunks.
+                # The page is rendered while it is sent, so this try only covers
+                # setting up the response; a failing module's get_dashboard_html()
+                # is caught in iter_dashboard() and becomes an error card instead.
+                return ChunkedResponse(request, self.iter_dashboard, content_type="text/html")
             except Exception as e:
                 self.startup_print("Error rendering dashboard: {}".format(e))
                 return Response(request, "<h1>Error</h1><p>Could not render dashboard.</p>", content_type="text/html")
 
+        @self.server.route("/status", methods=['GET'])
+        def status_route(request: Request):
+            # One round-trip for every module's status; ?modules=a,b limits the set
+            wanted = request.query_params.get("modules")
+            names = wanted.split(",") if wanted else self.module_order
+            status = {}
+            for name in names:
+                module = self.modules.get(name)
+                if module is not None and hasattr(module, 'get_status_dict'):
+                    module_status = module.get_status_dict()
+                    if module_status is not None:
+                        status[name] = module_status
+            body = json.dumps(status)
+            # Steady-state polls usually match; answer those with a bodiless 304
+            etag = '"%x"' % (hash(body) & 0xFFFFFFFF)
+            if request.headers.get("If-None-Match") == etag:
+                return Response(request, b"", status=(304, "Not Modified"), headers={"ETag": etag})
+            return Response(request, body, content_type="application/json", headers={"ETag": etag})
+
         self.server_ip = "192.168.4.1"
         self.server.start(self.server_ip, port=80)
         self.startup_print("Foundation ready at http://{}".format(self.server_ip))
@@ -186,9 +237,8 @@ class WicdpicoFoundation:
     def poll(self):
         try:
             self.server.poll()
-            for module in self.modules.values():
-                if hasattr(module, 'update'):
-                    module.update()
+            for update in self.update_callbacks:
+                update()
         except Exception as e:
             if not self.poll_error_logged:
                 self.startup_print("Error in poll cycle: {}".format(e))
@@ -201,10 +251,18 @@ class WicdpicoFoundation:
             gc.collect()
 
     def render_dashboard(self, title=None):
+        return "".join(self.iter_dashboard(title))
+
+    def iter_dashboard(self, title=None):
+        """Yields the dashboard page in fragments so it never has to exist as one string.
+
+        Module errors are caught per module and yielded as an error card, so
+        one broken module can't cut off a page that is already being streamed.
+        """
         if title is None:
             title = "Wicdpico Dashboard v{}".format(self.config.WICDPICO_VERSION)
 
-        modules_html = ""
+        yield self.templates.render_page_head(title)
         # MODIFIED: Loop over the ordered list instead of the dictionary
         for name in self.module_order:
             module = self.modules[name]
@@ -212,9 +270,9 @@ class WicdpicoFoundation:
                 if hasattr(module, 'get_dashboard_html'):
                     module_html = module.get_dashboard_html()
                     if module_html:
-                        modules_html += module_html
+                        yield module_html
             except Exception as e:
-                modules_html += '<div class="module"><h3>{}</h3><p>Error loading module: {}</p></div>\n'.format(name, e)
+                yield '<div class="module"><h3>{}</h3><p>Error loading module: {}</p></div>\n'.format(name, e)
 
         system_info = """
             <p><strong>Sensor Meter:</strong> Standalone AP Mode</p>
@@ -223,4 +281,4 @@ class WicdpicoFoundation:
             <p><strong>Modules loaded:</strong> {}</p>
             <p><strong>System status:</strong> {}</p>
         """.format(self.config.WIFI_SSID, len(self.modules), 'Configuration Error' if self.config_failed else 'Ready')
-        return self.templates.render_page(title, modules_html, system_info)
\ No newline at end of file
+        yield self.templates.render_page_tail(system_info)
@@ -112,37 +112,45 @@ class TemplateSystem:
     
     def render_page(self, title, modules_html, system_info=None):
         """Render complete responsive page with modules"""
-        system_section = ""
-        if system_info:
-            system_section = f"""
-            <div class="module">
-                <h3>System Status</h3>
-                <div class="status">
-                    {system_info}
-                </div>
-            </div>
-            """
-        
-        return f"""
+        return self.render_page_head(title) + modules_html + self.render_page_tail(system_info)
+
+    def render_page_head(self, title):
+        """Page markup up to where module widgets go; used to stream the dashboard"""
+        return """
         <!DOCTYPE html>
         <html lang="en">
         <head>
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <title>{title}</title>
-            {self.base_css}
+            {base_css}
         </head>
         <body>
             <div class="container">
                 <h1>{title}</h1>
                 
                 <div class="grid">
-                    {modules_html}
+                    """.format(title=title, base_css=self.base_css)
+
+    def render_page_tail(self, system_info=None):
+        """Page markup after the module widgets"""
+        system_section = ""
+        if system_info:
+            system_section = """
+            <div class="module">
+                <h3>System Status</h3>
+                <div class="status">
+                    {}
+                </div>
+            </div>
+            """.format(system_info)
+
+        return """
                 </div>
                 
                 {system_section}
             </div>
-            {self.base_js}
+            {base_js}
         </body>
         </html>
-        """
\ No newline at end of file
+        """.format(system_section=system_section, base_js=self.base_js)
@@ -1,30 +1,48 @@
 # module_SD_manager.py
 
 import os
-import gc
 import board
 import busio
 import storage
 import adafruit_sdcard
 import digitalio
 from module_base import WicdpicoModule
-from adafruit_httpserver import Response
+from adafruit_httpserver import Response, ChunkedResponse
 import re
 
+_PERCENT_RE = re.compile(r'%([0-9A-Fa-f]{2})')
+
+def _unquote_repl(match):
+    return chr(int(match.group(1), 16))
+
 def url_unquote(s):
-    def repl(match):
-        return chr(int(match.group(1), 16))
-    return re.sub(r'%([0-9A-Fa-f]{2})', repl, s)
+    if '%' not in s:
+        return s
+    return _PERCENT_RE.sub(_unquote_repl, s)
 
 class SDManagerModule(WicdpicoModule):
+    IO_BUFFER_SIZE = 4096
+
     def __init__(self, foundation):
         super().__init__(foundation)
         self.name = "SD Manager"
         self.version = "v4.2 (Final)"
         self.path = "/files"
         self.mount_point = "/sd"
+        # Trailing separator makes path checks stop at a directory boundary
+        self._mount_prefix = self.mount_point + "/"
         self.card_available = False
 
+        # One transfer buffer for every file read; the HTTP server handles a
+        # single request at a time, so it is never shared between responses.
+        self._io_buf = bytearray(self.IO_BUFFER_SIZE)
+        self._io_mv = memoryview(self._io_buf)
+
+        # Sorted listing kept in step with create/delete so refreshes after a
+        # mutation don't have to walk the FAT directory again.
+        self._listing_names = None
+        self._listing_text = None
+
         try:
             self._detect_and_mount_card()
             if self.card_available:
@@ -94,26 +112,85 @@ class SDManagerModule(WicdpicoModule):
         full_page = self.foundation.templates.render_page("SD Manager", module_html)
         return Response(request, full_page, content_type="text/html")
 
+    def _scan_listing(self):
+        """Rebuilds the cached listing from the card directory."""
+        names = []
+        for file in os.listdir(self.mount_point):
+            if not file.startswith('.'):
+                names.append(file)
+        # Sort bare names; the shared mount prefix is only added when rendering
+        names.sort()
+        self._listing_names = names
+        self._render_listing()
+
+    def _render_listing(self):
+        prefix = self._mount_prefix
+        self._listing_text = "Files found:\n\n" + "\n".join(prefix + name for name in self._listing_names)
+
+    def _listing_add(self, path):
+        """Inserts a newly written top-level file into the cached listing."""
+        names = self._listing_names
+        if names is None or path.rfind("/") != len(self.mount_point):
+            return
+        name = path[len(self._mount_prefix):]
+        if not name or name.startswith('.'):
+            return
+        i = 0
+        while i < len(names) and names[i] < name:
+            i += 1
+        if i < len(names) and names[i] == name:
+            return
+        names.insert(i, name)
+        self._render_listing()
+
+    def _listing_remove(self, path):
+        """Drops a deleted file from the cached listing."""
+        name = path[len(self._mount_prefix):]
+        if self._listing_names is not None and name in self._listing_names:
+            self._listing_names.remove(name)
+            self._render_listing()
+
     def list_files(self, request):
-        files = []
         if self.card_available:
             try:
-                for file in os.listdir(self.mount_point):
-                    if not file.startswith('.'):
-                        files.append("{}/{}".format(self.mount_point, file))
-                response_body = "Files found:\n\n" + "\n".join(sorted(files))
+                # Explicit listings rescan so files written by other modules show up;
+                # refreshes after create/delete ask for the cached copy.
+                if self._listing_names is None or not request.query_params.get("cached"):
+                    self._scan_listing()
+                response_body = self._listing_text
             except Exception as e:
                 response_body = "Error listing files: " + str(e)
         else:
             response_body = "No SD card mounted."
         return Response(request, response_body, content_type="text/plain")
 
+    def _stream_file(self, path, prefix=None):
+        """Returns a chunk generator that sends a file through the shared buffer.
+
+        The file is opened inside the generator, so a response that fails
+        before its body is sent never holds a file handle.
+        """
+        def body():
+            f = open(path, 'rb')
+            try:
+                if prefix:
+                    yield prefix
+                while True:
+                    n = f.readinto(self._io_buf)
+                    if not n:
+                        break
+                    yield self._io_mv[:n]
+            finally:
+                f.close()
+        return body
+
     def open_file(self, request):
         try:
             filename = request.form_data.get('filename', '')
             if filename:
-                with open(filename, 'r') as f: content = f.read()
-                return Response(request, "File: {}\n\n{}".format(filename, content), content_type="text/plain")
+                os.stat(filename)  # Report a missing file here, before any headers go out
+                body = self._stream_file(filename, "File: {}\n\n".format(filename))
+                return ChunkedResponse(request, body, content_type="text/plain")
             return Response(request, "No file specified.", content_type="text/plain")
         except Exception as e:
             return Response(request, "Error: Could not read file - {}".format(str(e)), content_type="text/plain")
@@ -128,13 +205,12 @@ class SDManagerModule(WicdpicoModule):
             filename = url_unquote(filename)
             
             # Reconstruct the full path on the server side
-            filepath = self.mount_point + "/" + filename
+            filepath = self._mount_prefix + filename
             
-            with open(filepath, "r") as f:
-                file_content = f.read()
+            os.stat(filepath)  # Report a missing file here, before any headers go out
             
             headers = { "Content-Disposition": "attachment; filename={}".format(filename) }
-            return Response(request, file_content, content_type="text/plain", headers=headers)
+            return ChunkedResponse(request, self._stream_file(filepath), content_type="text/plain", headers=headers)
         
         except Exception as e:
             return Response(request, "Error downloading file: " + str(e), content_type="text/plain")
@@ -144,10 +220,11 @@ class SDManagerModule(WicdpicoModule):
         try:
             filename = request.form_data.get('filename', '')
             content = request.form_data.get('content', '')
-            if not filename.startswith(self.mount_point):
+            if not filename.startswith(self._mount_prefix):
                  return Response(request, "Error: Can only save to SD card.", content_type="text/plain")
 
-            with open(filename, 'w') as f: f.write(content)
+            with open(filename, 'wb') as f: f.write(content.encode())
+            self._listing_add(filename)
             return Response(request, "File '{}' saved successfully!".format(filename), content_type="text/plain")
         except Exception as e:
             return Response(request, "Error: Could not save file - {}".format(str(e)), content_type="text/plain")
@@ -160,13 +237,14 @@ class SDManagerModule(WicdpicoModule):
             if not filename:
                 return Response(request, "Filename cannot be empty.", content_type="text/plain")
             
-            full_path = "{}/{}".format(self.mount_point, filename)
+            full_path = self._mount_prefix + filename
 
             try:
                 os.stat(full_path)
                 return Response(request, "Error: File '{}' already exists.".format(full_path), content_type="text/plain")
             except OSError:
-                with open(full_path, 'w') as f: f.write(content)
+                with open(full_path, 'wb') as f: f.write(content.encode())
+                self._listing_add(full_path)
                 return Response(request, "File '{}' created successfully!".format(full_path), content_type="text/plain")
         except Exception as e:
             return Response(request, "Error: Could not create file - {}".format(str(e)), content_type="text/plain")
@@ -175,9 +253,10 @@ class SDManagerModule(WicdpicoModule):
         if not self.card_available: return Response(request, "Error: SD Card not available.", content_type="text/plain")
         try:
             filename = request.form_data.get('filename', '')
-            if not filename.startswith(self.mount_point):
+            if not filename.startswith(self._mount_prefix):
                  return Response(request, "Error: Can only delete from SD card.", content_type="text/plain")
             os.remove(filename)
+            self._listing_remove(filename)
             return Response(request, "File '{}' deleted successfully!".format(filename), content_type="text/plain")
         except Exception as e:
             return Response(request, "Error: Could not delete file - {}".format(str(e)), content_type="text/plain")
@@ -224,6 +303,11 @@ class SDManagerModule(WicdpicoModule):
         <script>
             let selectedFile = null;
             function showUi(elementId, show) {{ document.getElementById(elementId).style.display = show ? 'block' : 'none'; }}
+            function postForm(url, fields) {{
+                const formData = new FormData();
+                for (const key in fields) formData.append(key, fields[key]);
+                return fetch(url, {{ method: 'POST', body: formData }}).then(r => r.text());
+            }}
             function selectFile(filename) {{
                 selectedFile = filename;
                 document.getElementById('selected-file-span').textContent = filename;
@@ -232,8 +316,8 @@ class SDManagerModule(WicdpicoModule):
                     row.style.backgroundColor = row.textContent === filename ? '#dbeafe' : '';
                 }});
             }}
-            function loadFileManager() {{
-                fetch('/list-files', {{ method: 'POST' }})
+            function loadFileManager(cached) {{
+                fetch(cached ? '/list-files?cached=1' : '/list-files', {{ method: 'POST' }})
                 .then(r => r.text())
                 .then(text => {{
                     const lines = text.split('\\n');
@@ -258,10 +342,7 @@ class SDManagerModule(WicdpicoModule):
             }}
             function openSelectedFile() {{
                 if (!selectedFile) return;
-                const formData = new FormData();
-                formData.append('filename', selectedFile);
-                fetch('/open-file', {{ method: 'POST', body: formData }})
-                .then(r => r.text())
+                postForm('/open-file', {{ filename: selectedFile }})
                 .then(text => {{
                     const content = text.substring(text.indexOf('\\n\\n') + 2);
                     document.getElementById('editor-title').textContent = 'Editing: ' + selectedFile;
@@ -277,39 +358,28 @@ class SDManagerModule(WicdpicoModule):
             function saveFile() {{
                 if (!selectedFile) return;
                 const content = document.getElementById('file-editor').value;
-                const formData = new FormData();
-                formData.append('filename', selectedFile);
-                formData.append('content', content);
-                fetch('/save-file', {{ method: 'POST', body: formData }})
-                .then(r => r.text()).then(alert);
+                postForm('/save-file', {{ filename: selectedFile, content: content }}).then(alert);
             }}
             function createFile() {{
                 const filename = document.getElementById('new-filename').value.trim();
                 const content = document.getElementById('new-file-content').value;
                 if (!filename) {{ alert('Filename cannot be empty.'); return; }}
-                const formData = new FormData();
-                formData.append('filename', filename);
-                formData.append('content', content);
-                fetch('/create-file', {{ method: 'POST', body: formData }})
-                .then(r => r.text())
+                postForm('/create-file', {{ filename: filename, content: content }})
                 .then(result => {{
                     alert(result);
                     if (result.includes('created successfully')) {{
                         hideCreateFile();
-                        loadFileManager();
+                        loadFileManager(true);
                     }}
                 }});
             }}
             function showDeleteConfirm() {{
                 if (!selectedFile) return;
                 if (confirm("Are you sure you want to delete '" + selectedFile + "'?")) {{
-                    const formData = new FormData();
-                    formData.append('filename', selectedFile);
-                    fetch('/delete-file', {{ method: 'POST', body: formData }})
-                    .then(r => r.text())
+                    postForm('/delete-file', {{ filename: selectedFile }})
                     .then(result => {{
                         alert(result);
-                        loadFileManager();
+                        loadFileManager(true);
                     }});
                 }}
             }}
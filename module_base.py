@@ -96,6 +96,7 @@ class WicdpicoModule:
         """
         self.foundation = foundation
         self.enabled = False
+        self.status_key = None  # Set to the registration name by foundation.register_module()
         
     def register_routes(self, server):
         """
@@ -176,6 +177,20 @@ class WicdpicoModule:
         """
         pass
         
+    def get_status_dict(self):
+        """
+        Return a small JSON-serializable status dict, or None.
+        
+        Override this method to contribute to the foundation's batched
+        ``/status`` endpoint, which returns every module's status in one
+        response keyed by registration name. Dashboards can then poll a
+        single URL instead of one endpoint per module.
+        
+        :return: Status values for this module, or None to be left out
+        :rtype: dict
+        """
+        return None
+        
     def cleanup(self):
         """
         Shutdown procedures.
@@ -1,46 +1,135 @@
 # module_battery_monitor.py
 import board
 import analogio
-import json
-import os
 import time
 from module_base import WicdpicoModule
 from adafruit_httpserver import Request, Response
 
+# VSYS in centivolts at ADC full scale: VSYS is divided by 3 on the board and
+# the ADC reference is 3.3 V, so 3 * 3.3 * 100. The >> 16 below applies the
+# 1/65536 per-count scale.
+_FULL_SCALE_CENTIVOLTS = 990
+
+def _raw_to_centivolts(raw):
+    """Converts a raw 16-bit VSYS reading to hundredths of a volt with integer math."""
+    return (raw * _FULL_SCALE_CENTIVOLTS + 32768) >> 16
+
+# CSV row layout: fixed-width timestamp, then the power state from a lookup
+_ROW_TIMESTAMP_TEMPLATE = b"0000-00-00 00:00:00,"
+_ROW_NO_TIMESTAMP = b"N/A,"
+_ROW_STATES = {"USB": b"USB\n", "BATTERY": b"BATTERY\n"}
+
+def _put_digits(buf, pos, value, width):
+    """Writes value as zero-padded ASCII digits into buf[pos:pos + width]."""
+    for i in range(pos + width - 1, pos - 1, -1):
+        buf[i] = 48 + value % 10
+        value //= 10
+
+# /battery-status bodies; fixed schema, so no JSON encoder is needed
+_STATUS_TEMPLATE = '{"voltage": %s, "power_state": "%s"}'
+_STATUS_UNAVAILABLE = '{"error": "Monitoring unavailable"}'
+_STATUS_READ_ERROR = '{"error": "Error reading voltage"}'
+
+# Dashboard widget markup; built once at import, live values come from /battery-status
+_DASHBOARD_HTML = """
+        <div class="module">
+            <h2>Battery Monitor</h2>
+            <p>Monitors the Pico's power source and voltage.</p>
+            <div class="control-group">
+                <button id="battery-status-btn" onclick="getBatteryStatus()">Get Status</button>
+            </div>
+            <div id="battery-status-display" style="margin-top: 10px;">
+                <div><strong>Voltage:</strong> <span id="voltage-value">--</span> V</div>
+                <div><strong>Power Source:</strong> <span id="power-source-value">--</span></div>
+            </div>
+            <p id="battery-error-display" style="color: red;"></p>
+        </div>
+        <script>
+        function getBatteryStatus() {
+            const btn = document.getElementById('battery-status-btn');
+            const voltageEl = document.getElementById('voltage-value');
+            const sourceEl = document.getElementById('power-source-value');
+            const errorEl = document.getElementById('battery-error-display');
+            
+            btn.disabled = true;
+            btn.textContent = 'Reading...';
+            errorEl.textContent = '';
+
+            fetch('/battery-status')
+                .then(response => response.json())
+                .then(data => {
+                    if (data.error) {
+                        errorEl.textContent = 'Error: ' + data.error;
+                        voltageEl.textContent = '--';
+                        sourceEl.textContent = '--';
+                    } else {
+                        voltageEl.textContent = data.voltage;
+                        sourceEl.textContent = data.power_state;
+                    }
+                })
+                .catch(error => {
+                    errorEl.textContent = 'Error: Failed to fetch status.';
+                })
+                .finally(() => {
+                    btn.disabled = false;
+                    btn.textContent = 'Get Status';
+                });
+        }
+        document.addEventListener('DOMContentLoaded', getBatteryStatus);
+        </script>
+        """
+
 class BatteryMonitorModule(WicdpicoModule):
     """
     Battery Monitor Module with automatic logging of power state changes.
     """
     USB_THRESHOLD = 4.4
     BATTERY_THRESHOLD = 4.2
+    POLL_INTERVAL_NS = 1000000000  # Power source check period (1 s)
 
     def __init__(self, foundation):
         super().__init__(foundation)
         self.name = "Battery Monitor"
         self.version = "v3.0"
         self.power_state = "UNKNOWN"
+        self.last_voltage = None  # Latest sample taken by the power-state check
         self.log_file_path = "/sd/power.csv"
+        self._next_poll_ns = 0
+        self._log_fh = None  # Opened on the first logged change, kept open
+        self._row_buf = bytearray(32)
+        self._row_mv = memoryview(self._row_buf)
+        # Peer modules, looked up lazily since they may register after this one
+        self._sd = None
+        self._rtc = None
 
-        try:
-            self.adc = analogio.AnalogIn(board.VOLTAGE_MONITOR)
-            self.voltage_available = True
-            self._check_power_state() # Perform initial check
-            self.last_known_power_state = self.power_state # Initialize tracking variable
-            self.foundation.startup_print("Internal VSYS voltage monitoring initialized")
-        except Exception as e:
-            self.voltage_available = False
-            self.foundation.startup_print("Voltage monitoring failed: {}".format(e))
+        # The ADC is claimed on the first reading; the first update() tick
+        # takes that reading and records the baseline power state.
+        self.adc = None
+        self.voltage_available = True  # Not yet known; cleared if claiming the ADC fails
+        self.last_known_power_state = None
 
     def update(self):
         """
         Called by the main loop to continuously check for power state changes.
         """
+        # One integer compare is the whole idle tick; everything else waits
+        # for the deadline, including the availability check.
+        now = time.monotonic_ns()
+        if now < self._next_poll_ns:
+            return
+        self._next_poll_ns = now + self.POLL_INTERVAL_NS
         if not self.voltage_available:
             return
 
         # Get the latest power state
         self._check_power_state()
 
+        if self.last_known_power_state is None:
+            # The first known state is the baseline, not a change to log
+            if self.power_state != "UNKNOWN":
+                self.last_known_power_state = self.power_state
+            return
+
         # If the state has changed from the last one we logged, log it.
         if self.power_state != self.last_known_power_state and self.power_state != "UNKNOWN":
             self._log_power_change()
@@ -48,45 +137,91 @@ class BatteryMonitorModule(WicdpicoModule):
 
     def _log_power_change(self):
         """Logs the new power state to a CSV file on the SD card."""
-        sd_manager = self.foundation.get_module('sd_manager')
-        rtc = self.foundation.get_module('rtc')
+        if self._sd is None:
+            self._sd = self.foundation.get_module('sd_manager')
+        if self._rtc is None:
+            self._rtc = self.foundation.get_module('rtc')
+        sd_manager = self._sd
+        rtc = self._rtc
 
         # Only proceed if both SD card and RTC are available
         if not (sd_manager and sd_manager.card_available and rtc):
             return
 
+        # Assemble the row in place rather than through format strings
+        buf = self._row_buf
         try:
             now = rtc.current_time
-            timestamp = "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(now.tm_year, now.tm_mon, now.tm_mday, now.tm_hour, now.tm_min, now.tm_sec)
+            buf[0:20] = _ROW_TIMESTAMP_TEMPLATE
+            _put_digits(buf, 0, now.tm_year, 4)
+            _put_digits(buf, 5, now.tm_mon, 2)
+            _put_digits(buf, 8, now.tm_mday, 2)
+            _put_digits(buf, 11, now.tm_hour, 2)
+            _put_digits(buf, 14, now.tm_min, 2)
+            _put_digits(buf, 17, now.tm_sec, 2)
+            n = 20
         except Exception:
-            timestamp = "N/A"
+            buf[0:4] = _ROW_NO_TIMESTAMP
+            n = 4
 
-        csv_row = f"{timestamp},{self.power_state}\n"
+        state = _ROW_STATES[self.power_state]
+        buf[n:n + len(state)] = state
+        n += len(state)
 
         try:
-            header_needed = False
+            if self._log_fh is None:
+                self._open_log()
+            self._log_fh.write(self._row_mv[:n])
+            # Changes are rare and a drop to battery may precede a brownout,
+            # so each row is flushed rather than batched.
+            self._log_fh.flush()
+        except Exception as e:
+            self._close_log()
+            print("Failed to log power state: {}".format(e))
+
+    def _open_log(self):
+        """Opens the power log for appending, writing the header for a new file."""
+        import os
+        header_needed = False
+        try:
+            os.stat(self.log_file_path)
+        except OSError:
+            header_needed = True
+
+        self._log_fh = open(self.log_file_path, "ab")
+        if header_needed:
+            self._log_fh.write(b"Timestamp,PowerState\n")
+
+    def _close_log(self):
+        """Closes the power log; the next change reopens it."""
+        if self._log_fh is not None:
             try:
-                os.stat(self.log_file_path)
+                self._log_fh.close()
             except OSError:
-                header_needed = True
+                pass
+            self._log_fh = None
 
-            with open(self.log_file_path, "a") as f:
-                if header_needed:
-                    header = "Timestamp,PowerState\n"
-                    f.write(header)
-                f.write(csv_row)
-        except Exception as e:
-            print(f"Failed to log power state: {e}")
+    def cleanup(self):
+        """Closes the power log file handle and drops peer module references."""
+        self._close_log()
+        self._sd = None
+        self._rtc = None
 
 
     def get_voltage(self):
         """Gets current system voltage from the VSYS pin."""
         if not self.voltage_available:
             return None
+        if self.adc is None:
+            try:
+                self.adc = analogio.AnalogIn(board.VOLTAGE_MONITOR)
+                self.foundation.startup_print("Internal VSYS voltage monitoring initialized")
+            except Exception as e:
+                self.voltage_available = False
+                self.foundation.startup_print("Voltage monitoring failed: {}".format(e))
+                return None
         try:
-            raw_value = self.adc.value
-            voltage = (raw_value * 3.0 * 3.3) / 65535.0
-            return round(voltage, 2)
+            return _raw_to_centivolts(self.adc.value) / 100
         except Exception as e:
             self.foundation.startup_print("Error reading voltage: {}".format(e))
             return None
@@ -96,8 +231,8 @@ class BatteryMonitorModule(WicdpicoModule):
         voltage = self.get_voltage()
         if voltage is None:
             return
-        
-        current_state = self.power_state
+        self.last_voltage = voltage
+
         if voltage > self.USB_THRESHOLD:
             self.power_state = "USB"
         elif voltage < self.BATTERY_THRESHOLD:
@@ -120,67 +255,22 @@ class BatteryMonitorModule(WicdpicoModule):
 
     def get_battery_status(self, request: Request):
         """HTTP handler to get current battery voltage and power source."""
+        # Serve the sample update() already took instead of stalling on the ADC;
+        # a request before the first tick takes that first sample itself.
+        if self.last_voltage is None and self.voltage_available:
+            self._check_power_state()
+
         if not self.voltage_available:
-            return Response(request, json.dumps({"error": "Monitoring unavailable"}), content_type="application/json")
+            return Response(request, _STATUS_UNAVAILABLE, content_type="application/json")
 
-        self._check_power_state()
-        voltage = self.get_voltage()
+        voltage = self.last_voltage
 
         if voltage is None:
-            return Response(request, json.dumps({"error": "Error reading voltage"}), content_type="application/json")
+            return Response(request, _STATUS_READ_ERROR, content_type="application/json")
 
-        status = {
-            "voltage": voltage,
-            "power_state": self.power_state
-        }
-        return Response(request, json.dumps(status), content_type="application/json")
+        status = _STATUS_TEMPLATE % (voltage, self.power_state)
+        return Response(request, status, content_type="application/json")
 
     def get_dashboard_html(self):
-        """Generate HTML template for the enhanced battery monitor widget."""
-        return """
-        <div class="module">
-            <h2>Battery Monitor</h2>
-            <p>Monitors the Pico's power source and voltage.</p>
-            <div class="control-group">
-                <button id="battery-status-btn" onclick="getBatteryStatus()">Get Status</button>
-            </div>
-            <div id="battery-status-display" style="margin-top: 10px;">
-                <div><strong>Voltage:</strong> <span id="voltage-value">--</span> V</div>
-                <div><strong>Power Source:</strong> <span id="power-source-value">--</span></div>
-            </div>
-            <p id="battery-error-display" style="color: red;"></p>
-        </div>
-        <script>
-        function getBatteryStatus() {{
-            const btn = document.getElementById('battery-status-btn');
-            const voltageEl = document.getElementById('voltage-value');
-            const sourceEl = document.getElementById('power-source-value');
-            const errorEl = document.getElementById('battery-error-display');
-            
-            btn.disabled = true;
-            btn.textContent = 'Reading...';
-            errorEl.textContent = '';
-
-            fetch('/battery-status')
-                .then(response => response.json())
-                .then(data => {{
-                    if (data.error) {{
-                        errorEl.textContent = 'Error: ' + data.error;
-                        voltageEl.textContent = '--';
-                        sourceEl.textContent = '--';
-                    }} else {{
-                        voltageEl.textContent = data.voltage;
-                        sourceEl.textContent = data.power_state;
-                    }}
-                }})
-                .catch(error => {{
-                    errorEl.textContent = 'Error: Failed to fetch status.';
-                }})
-                .finally(() => {{
-                    btn.disabled = false;
-                    btn.textContent = 'Get Status';
-                }});
-        }}
-        document.addEventListener('DOMContentLoaded', getBatteryStatus);
-        </script>
-        """.format(version=self.version)
\ No newline at end of file
+        """Returns the battery monitor widget; the markup is static."""
+        return _DASHBOARD_HTML
\ No newline at end of file
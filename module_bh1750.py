@@ -1,19 +1,33 @@
-import json
+import time
 from module_base import WicdpicoModule
 from adafruit_httpserver import Request, Response
 
+# /light has a fixed schema; only read errors (which carry exception text) go through json
+_LIGHT_JSON = b'{"success": true, "lux": %d.%02d}'
+_UNAVAILABLE_JSON = b'{"success": false, "error": "BH1750 not available"}'
+
 class BH1750Module(WicdpicoModule):
     """
     Ambient Light Sensor Module (BH1750)
     Provides light sensing and dashboard integration.
+
+    Readings are reused for ``max_age`` seconds (default: one high-resolution
+    integration period) so repeated requests don't re-read the bus; pass 0
+    to always read the sensor.
     """
+    CACHE_MAX_AGE = 0.2
+    # Shape shared by every failed reading; copied, never returned directly
+    _ERROR_TEMPLATE = {"success": False, "lux": None}
 
-    def __init__(self, foundation):
+    def __init__(self, foundation, max_age=CACHE_MAX_AGE):
         super().__init__(foundation)
         self.name = "Ambient Light"
         self.version = "v1.0"
         self.lux = None
+        self.lux_x100 = None   # Last reading in hundredths of a lux, rounded once at read time
         self.available = False
+        self._max_age_ns = int(max_age * 1000000000)
+        self._last_reading_ns = 0
 
         try:
             import board
@@ -29,12 +43,23 @@ class BH1750Module(WicdpicoModule):
 
     def get_light(self):
         if not self.available:
-            return {"success": False, "error": "BH1750 not available"}
-        try:
-            self.lux = self.sensor.lux
-            return {"success": True, "lux": round(self.lux, 2)}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+            return self._make_error_dict("BH1750 not available")
+        now = time.monotonic_ns()
+        # Only the integer reading is cached; each caller gets its own dict
+        if self.lux_x100 is None or now - self._last_reading_ns >= self._max_age_ns:
+            try:
+                self.lux = self.sensor.lux
+                self.lux_x100 = int(self.lux * 100 + 0.5)
+                self._last_reading_ns = now
+            except Exception as e:
+                return self._make_error_dict(str(e))
+        return {"success": True, "lux": self.lux_x100 / 100}
+
+    def _make_error_dict(self, err):
+        """Returns a fresh error reading, so callers may mutate it freely."""
+        reading = dict(self._ERROR_TEMPLATE)
+        reading["error"] = err
+        return reading
 
     def get_routes(self):
         return [
@@ -46,8 +71,15 @@ class BH1750Module(WicdpicoModule):
             server.route(route, methods=["GET", "POST"])(handler)
 
     def handle_light_request(self, request: Request):
+        if not self.available:
+            return Response(request, _UNAVAILABLE_JSON, content_type="application/json")
         reading = self.get_light()
-        return Response(request, json.dumps(reading), content_type="application/json")
+        if reading["success"]:
+            body = _LIGHT_JSON % divmod(self.lux_x100, 100)
+        else:
+            import json
+            body = json.dumps(reading)
+        return Response(request, body, content_type="application/json")
 
     def get_dashboard_html(self):
         # FIX: matches battery monitor and RTC—no width/max-width/margin on outer div
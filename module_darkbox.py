@@ -21,11 +21,21 @@ import storage
 import adafruit_sdcard
 import digitalio
 import analogio
+from micropython import const
 from module_base import WicdpicoModule
 from adafruit_httpserver import Request, Response
 from foundation_core import shut_down_wifi_and_sleep
 
 
+# Per-event/per-write progress messages; const() lets the compiler drop them
+_DEBUG = const(False)
+
+# Single-shot SCD41 measurement states; see get_environment_reading()
+_ENV_IDLE = const(0)
+_ENV_MEASURING = const(1)
+_ENV_READY = const(2)
+_SCD4X_MEASURE_SINGLE_SHOT = const(0x219D)
+
 # AP timeout state variables (ensure these are shared with your AP logic)
 timeout_disabled = False
 ap_is_off_and_logged = False
@@ -52,9 +62,278 @@ try:
 except ImportError:
     RTC_AVAILABLE = False
 
+_DATA_CSV = "/sd/darkbox_data.csv"
+_LIGHT_CSV = "/sd/light_events.csv"
+
+# Written once when a log file is first created
+_CSV_HEADERS = {
+    _DATA_CSV: b"timestamp,co2_ppm,temp_c,humidity_percent,light_lux\n",
+}
+_DATA_LINE = b"%s,%s,%s,%s,%s\n"
+_EVENT_LINE = b"%s,%s,%.1f,%.1f\n"
+
+def _csv_field(value):
+    """CSV bytes for a reading; missing readings are left blank."""
+    return b"" if value is None else str(value).encode()
+
+# Static dashboard markup; get_dashboard_html() only fills in the latest readings.
+# The script is served separately from /darkbox.js so browsers can cache it.
+_DASHBOARD_HTML = '''
+        <div class="module">
+            <h3>Environment Sensor</h3>
+            <div style="font-size: 24px; font-weight: bold; text-align: center; padding: 20px; border: 2px solid #007bff; margin: 10px 0;">
+                CO2: <span id="co2-value">{co2_display}</span> ppm
+            </div>
+            <div style="display: flex; justify-content: space-around; text-align: center; margin-bottom: 20px;">
+                <div class="sensor-reading">
+                    <span style="font-weight: bold;">Temperature</span><br>
+                    <span id="temp-value" style="font-size: 1.5em;">{temp_display}</span> C
+                </div>
+                <div class="sensor-reading">
+                    <span style="font-weight: bold;">Humidity</span><br>
+                    <span id="humidity-value" style="font-size: 1.5em;">{humidity_display}</span> %
+                </div>
+            </div>
+            <div class="control-group">
+                <button id="environment-btn" onclick="getEnvironmentReading()">Get Reading</button>
+                <button onclick="window.location.href='/calibration'">Calibration</button>
+                <button id="log-btn" onclick="logData()">Log to SD</button>
+            </div>
+            <p id="environment-status">Ready for measurements</p>
+        </div>
+        <div class="module">
+            <h3>Light Status</h3>
+            <div style="font-size: 24px; font-weight: bold; text-align: center; padding: 20px; border: 2px solid #28a745; margin: 10px 0;">
+                Light: <span id="lux-value">{lux_display}</span> lux
+            </div>
+            <div class="control-group">
+                <button id="light-btn" onclick="getLightReading()">Read Lux</button>
+                <button id="read-light-log-btn" onclick="readLightLogFile()">Read Light Log</button>
+                <button id="clear-events-btn" onclick="clearLightEvents()">Clear Light Events</button>
+            </div>
+            <p id="light-status">Ready for measurements</p>
+        </div>
+        <div class="module" id="power-monitor">
+            <h3>Power Monitoring</h3>
+            <div>
+                <button data-ep="/power-voltage" data-target="power-voltage" data-suffix=" V">Get Voltage</button>
+                <span id="power-voltage" style="margin-left:1em;">--</span>
+                <button data-ep="/power-source" data-target="power-state">Get Power Source</button>
+                <button onclick="viewPowerLog()">View Log</button>
+                <div>Power Source: <span id="power-state">{power_state}</span></div>
+            </div>
+        </div>
+        <div class="module" id="hotspot-timeout-card">
+          <h3>Wi-Fi Hotspot Timeout</h3>
+          <p id="hotspot-timeout-desc">
+            By default, the Wi-Fi hotspot (AP) will shut down after a period of inactivity for security and power saving.
+            You can disable this timeout to keep the AP open, or manually close it now.
+          </p>
+          <button id="hotspot-btn" onclick="toggleHotspotControl()">Loading...</button>
+          <div id="hotspot-result"></div>
+        </div>
+        <script src="/darkbox.js"></script>
+        '''
+
+_DARKBOX_JS = '''
+        // One listener serves every button that declares its endpoint in data-ep
+        document.getElementById('power-monitor').addEventListener('click', e => {
+            const b = e.target.closest('button[data-ep]');
+            if (!b) return;
+            fetch(b.dataset.ep, {method:'POST'})
+                .then(r => r.text())
+                .then(t => document.getElementById(b.dataset.target).innerText = t + (b.dataset.suffix || ''));
+        });
+        function viewPowerLog() {
+            fetch('/power-log')
+                .then(response => response.text())
+                .then(log => {
+                    alert('Power Event Log:\\n' + log);
+                })
+                .catch(error => {
+                    alert('Error reading power log: ' + error.message);
+                });
+        }
+
+        // Wi-Fi Hotspot Timeout Card Logic (from picowide)
+        function updateHotspotButton() {
+            fetch('/get-hotspot-status')
+                .then(response => response.json())
+                .then(status => {
+                    const btn = document.getElementById('hotspot-btn');
+                    if (status.timeout_disabled) {
+                        btn.textContent = 'Close Hotspot';
+                    } else {
+                        btn.textContent = 'Keep Hotspot Open';
+                    }
+                })
+                .catch(() => {
+                    document.getElementById('hotspot-btn').textContent = 'Unavailable';
+                });
+        }
+
+        function toggleHotspotControl() {
+            const btn = document.getElementById('hotspot-btn');
+            if (btn.textContent === 'Close Hotspot') {
+                // Show confirmation before closing
+                if (confirm("Are you sure you want to close the Wi-Fi hotspot? A physical power cycle will be required to restart it.")) {
+                    fetch('/toggle-hotspot-control', { method: 'POST' })
+                        .then(response => response.text())
+                        .then(result => {
+                            document.getElementById('hotspot-result').textContent = result;
+                            btn.disabled = true;
+                        })
+                        .catch(error => {
+                            document.getElementById('hotspot-result').textContent = 'Error: ' + error.message;
+                        });
+                }
+            } else {
+                fetch('/toggle-hotspot-control', { method: 'POST' })
+                    .then(response => response.text())
+                    .then(result => {
+                        btn.textContent = 'Close Hotspot';
+                        document.getElementById('hotspot-result').textContent = 'Automatic timeout disabled. Hotspot will remain open.';
+                    })
+                    .catch(error => {
+                        document.getElementById('hotspot-result').textContent = 'Error: ' + error.message;
+                    });
+            }
+        }
+
+        // Initialize button state on page load
+        document.addEventListener('DOMContentLoaded', updateHotspotButton);
+
+        function getEnvironmentReading() {
+            const btn = document.getElementById('environment-btn');
+            const statusEl = document.getElementById('environment-status');
+            btn.disabled = true;
+            btn.textContent = 'Reading...';
+            statusEl.textContent = 'Measuring... This takes about 5 seconds.';
+            pollEnvironmentReading();
+        }
+        // The first POST starts the measurement; repeat it until the result is no longer pending
+        function pollEnvironmentReading() {
+            const btn = document.getElementById('environment-btn');
+            const statusEl = document.getElementById('environment-status');
+            fetch('/darkbox-environment', { method: 'POST' })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.pending) {
+                        setTimeout(pollEnvironmentReading, 500);
+                        return;
+                    }
+                    if (data.success) {
+                        document.getElementById('co2-value').textContent = data.co2;
+                        document.getElementById('temp-value').textContent = data.temp.toFixed(1);
+                        document.getElementById('humidity-value').textContent = data.humidity.toFixed(1);
+                        statusEl.textContent = 'Last reading successful.';
+                    } else {
+                        statusEl.textContent = 'Error: ' + data.error;
+                    }
+                    btn.disabled = false; btn.textContent = 'Get Reading';
+                })
+                .catch(error => {
+                    statusEl.textContent = 'Error: ' + error.message;
+                    btn.disabled = false; btn.textContent = 'Get Reading';
+                });
+        }
+        function getLightReading() {
+            const btn = document.getElementById('light-btn');
+            const statusEl = document.getElementById('light-status');
+            btn.disabled = true;
+            btn.textContent = 'Reading...';
+            statusEl.textContent = 'Reading light level...';
+            fetch('/darkbox-light', { method: 'POST' })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.success) {
+                        document.getElementById('lux-value').textContent = data.lux;
+                        statusEl.textContent = 'Last reading successful.';
+                    } else {
+                        statusEl.textContent = 'Error: ' + data.error;
+                    }
+                }).finally(() => { btn.disabled = false; btn.textContent = 'Read Lux'; });
+        }
+        function logData() {
+            const btn = document.getElementById('log-btn');
+            const statusEl = document.getElementById('environment-status');
+            btn.disabled = true;
+            btn.textContent = 'Logging...';
+            statusEl.textContent = 'Logging data to SD card...';
+            fetch('/darkbox-log', { method: 'POST' })
+                .then(response => response.text())
+                .then(message => { statusEl.textContent = message; })
+                .catch(error => { statusEl.textContent = 'Log Error: ' + error.message; })
+                .finally(() => { btn.disabled = false; btn.textContent = 'Log to SD'; });
+        }
+
+        function clearLightEvents() {
+            const btn = document.getElementById('clear-events-btn');
+            btn.disabled = true;
+            btn.textContent = 'Clearing...';
+            fetch('/darkbox-clear-events', { method: 'POST' })
+                .then(response => response.text())
+                .then(message => {
+                    alert(message);
+                })
+                .catch(error => {
+                    alert('Error clearing events: ' + error.message);
+                })
+                .finally(() => {
+                    btn.disabled = false;
+                    btn.textContent = 'Clear Light Events';
+                });
+        }
+        function readLightLogFile() {
+            const btn = document.getElementById('read-light-log-btn');
+            btn.disabled = true;
+            btn.textContent = 'Reading...';
+            fetch('/darkbox-read-light-log')
+                .then(response => response.text())
+                .then(log => {
+                    alert('Light Log File Contents:\\n' + log);
+                })
+                .catch(error => {
+                    alert('Error reading light log: ' + error.message);
+                })
+                .finally(() => {
+                    btn.disabled = false;
+                    btn.textContent = 'Read Light Log';
+                });
+        }
+        function toggleHotspotControl() {
+            const btn = document.getElementById('hotspot-btn');
+            const resultEl = document.getElementById('hotspot-result');
+            btn.disabled = true;
+            btn.textContent = 'Toggling...';
+            fetch('/toggle-hotspot-control', { method: 'POST' })
+                .then(response => response.text())
+                .then(message => {
+                    resultEl.textContent = message;
+                    btn.textContent = 'Close Hotspot';
+                })
+                .catch(error => {
+                    resultEl.textContent = 'Error: ' + error.message;
+                    btn.textContent = 'Error';
+                })
+                .finally(() => {
+                    btn.disabled = false;
+                });
+        }
+'''
+
+_JS_HEADERS = {"Cache-Control": "public, max-age=86400"}
+
 class DarkBoxModule(WicdpicoModule):
     USB_THRESHOLD = 4.4
     BATTERY_THRESHOLD = 4.2
+    SD_FLUSH_BYTES = 512  # One SD sector; lines are written in sector-sized batches
+    SD_FLUSH_INTERVAL = 60  # Seconds a buffered line may wait before it is written anyway
+    SD_BUFFER_MAX = 4096  # Bytes kept per file across failed writes before they are dropped
+    ENV_POLL_INTERVAL = 0.25  # Seconds between data_ready checks while measuring
+    ENV_TIMEOUT = 10  # Single shot takes ~5 s; give up well after that
+    ENV_RESULT_MAX_AGE = 10  # Uncollected results older than this are discarded
+    LIGHT_EVENTS_SIZE = 100
 
     """Simple DarkBox module combining SCD41 and BH1750 simple patterns."""
     
@@ -68,6 +347,11 @@ class DarkBoxModule(WicdpicoModule):
         self.last_temp = None
         self.last_humidity = None
         self.scd41 = None
+        self._env_state = _ENV_IDLE
+        self._env_started = 0
+        self._env_next_check = 0
+        self._env_result = None
+        self._log_pending = False  # A log request is waiting for the current measurement
         
         self.bh1750_available = False
         self.last_lux = None
@@ -76,12 +360,20 @@ class DarkBoxModule(WicdpicoModule):
         self.rtc_available = False
         self.rtc = None
         
-        self.light_events = []
+        # Fixed ring of recent light events; overwrites the oldest when full
+        self.light_events = [None] * self.LIGHT_EVENTS_SIZE
+        self._events_head = 0
+        self._events_count = 0
         self.current_event = None
         self.dark_count = 0
         self.last_light_check = 0
+        self._tick_errors_logged = set()  # Per-tick check names that have reported an error
         
         self.sd_mounted = False
+        self._sd_buffers = {}  # path -> bytearray of lines not yet on the card
+        self._sd_files = {}  # path -> file kept open for appending
+        self._sd_flush_due = None  # monotonic time the oldest buffered line must be written by
+        self._sd_retrying = False  # Last write failed; _sd_flush_due is the retry deadline
         
         self.vsys_adc = analogio.AnalogIn(board.A3)  # VSYS voltage monitor (ADC3/GP29)
 
@@ -150,28 +442,80 @@ class DarkBoxModule(WicdpicoModule):
             self.foundation.startup_print(f"Sensor initialization failed: {e}")
 
     def get_environment_reading(self):
-        """Get CO2, temp, humidity readings from SCD41."""
+        """Get CO2, temp, humidity readings from SCD41 without blocking.
+
+        The first call starts a single-shot measurement and returns
+        ``{"success": False, "pending": True}``; update() collects the result
+        once the sensor reports data ready, and the next call returns it.
+        """
         if not self.scd41_available:
             return {"success": False, "error": "SCD41 sensor not available"}
-        
-        try:
-            self.scd41.measure_single_shot()
-            time.sleep(5)
-            
-            co2_ppm = self.scd41.CO2
-            temp_c = self.scd41.temperature
-            humidity = self.scd41.relative_humidity
 
-            if co2_ppm is None:
-                return {"success": False, "error": "Sensor warming up"}
-            
-            self.last_co2 = co2_ppm
-            self.last_temp = temp_c
-            self.last_humidity = humidity
-            
-            return {"success": True, "co2": int(co2_ppm), "temp": temp_c, "humidity": humidity}
+        if self._env_state == _ENV_READY:
+            if time.monotonic() - self._env_started <= self.ENV_TIMEOUT + self.ENV_RESULT_MAX_AGE:
+                self._env_state = _ENV_IDLE
+                return self._env_result
+            self._env_state = _ENV_IDLE  # Nobody collected it; measure again
+        if self._env_state == _ENV_IDLE:
+            error = self._start_measurement()
+            if error:
+                return error
+        return {"success": False, "pending": True}
+
+    def _start_measurement(self):
+        """Start a single-shot measurement. Returns an error dict, or None on success."""
+        try:
+            # adafruit_scd4x's measure_single_shot() sleeps 5 s after sending the
+            # command; send it without the delay and let update() poll data_ready.
+            if hasattr(self.scd41, "_send_command"):
+                self.scd41._send_command(_SCD4X_MEASURE_SINGLE_SHOT, cmd_delay=0)
+            else:
+                self.scd41.measure_single_shot()  # Unknown driver version; blocks
         except Exception as e:
             return {"success": False, "error": str(e)}
+        now = time.monotonic()
+        self._env_started = now
+        self._env_next_check = now + self.ENV_POLL_INTERVAL
+        self._env_state = _ENV_MEASURING
+        return None
+
+    def _check_environment_reading(self):
+        """Latch the single-shot result once the SCD41 has it - called every loop."""
+        now = time.monotonic()
+        if now < self._env_next_check:
+            return
+        self._env_next_check = now + self.ENV_POLL_INTERVAL
+        try:
+            if not self.scd41.data_ready:
+                if now - self._env_started <= self.ENV_TIMEOUT:
+                    return
+                self._env_result = {"success": False, "error": "Measurement timed out"}
+            else:
+                co2_ppm = self.scd41.CO2
+                temp_c = self.scd41.temperature
+                humidity = self.scd41.relative_humidity
+
+                if co2_ppm is None:
+                    self._env_result = {"success": False, "error": "Sensor warming up"}
+                else:
+                    self.last_co2 = co2_ppm
+                    self.last_temp = temp_c
+                    self.last_humidity = humidity
+                    self._env_result = {"success": True, "co2": int(co2_ppm), "temp": temp_c, "humidity": humidity}
+        except (OSError, RuntimeError) as e:
+            self._env_result = {"success": False, "error": str(e)}
+        except Exception as e:
+            # Anything else is a driver/data bug; report it but keep the loop running
+            self._log_tick_error("SCD41 reading", e)
+            self._env_result = {"success": False, "error": str(e)}
+        self._env_state = _ENV_READY
+
+        if self._log_pending:
+            # A log request was waiting on this measurement; write its row now
+            self._log_pending = False
+            result = self._write_data_row(self._env_result)
+            if not result["success"]:
+                print(f"✗ Sensor data log failed: {result['error']}")
 
     def get_light_reading(self):
         """Get light level reading from BH1750."""
@@ -216,7 +560,8 @@ class DarkBoxModule(WicdpicoModule):
                 if self.current_event is None:
                     timestamp = self._get_timestamp()
                     self.current_event = {'start_time': timestamp, 'start_mono': current_time, 'peak_lux': lux}
-                    self.foundation.startup_print(f"Light event started: {lux} lux at {timestamp}")
+                    if _DEBUG:
+                        self.foundation.startup_print(f"Light event started: {lux} lux at {timestamp}")
                 elif lux > self.current_event['peak_lux']:
                     self.current_event['peak_lux'] = lux
             else:
@@ -226,42 +571,140 @@ class DarkBoxModule(WicdpicoModule):
                         timestamp = self._get_timestamp()
                         duration = current_time - self.current_event['start_mono']
                         event = (self.current_event['start_time'], timestamp, self.current_event['peak_lux'], duration)
-                        self.light_events.append(event)
-                        if len(self.light_events) > 100: self.light_events.pop(0)
-                        self.foundation.startup_print(f"Light event ended: {duration:.1f}s duration, peak {self.current_event['peak_lux']:.1f} lux")
+                        self.light_events[self._events_head] = event
+                        self._events_head = (self._events_head + 1) % self.LIGHT_EVENTS_SIZE
+                        if self._events_count < self.LIGHT_EVENTS_SIZE:
+                            self._events_count += 1
+                        if _DEBUG:
+                            self.foundation.startup_print(f"Light event ended: {duration:.1f}s duration, peak {self.current_event['peak_lux']:.1f} lux")
                         self._log_event_to_sd(event)
                         self.current_event = None
                         self.dark_count = 0
-        except Exception:
+        except (OSError, RuntimeError):
+            # I2C read failures; skip this tick and try again on the next one
             pass
+        except Exception as e:
+            # Anything else (e.g. a None lux) is reported, and the tick skipped
+            self._log_tick_error("Light event check", e)
+
+    def _log_tick_error(self, where, e):
+        """Reports the first unexpected error from each per-tick check, so a persistent fault can't flood the log."""
+        if where not in self._tick_errors_logged:
+            self.foundation.startup_print(f"✗ DarkBox {where} error: {e}")
+            self._tick_errors_logged.add(where)
 
     def _log_event_to_sd(self, event):
-        """Log event to SD card - simple append."""
-        try:
-            with open("/sd/light_events.csv", "a") as f:
-                f.write(f"{event[0]},{event[1]},{event[2]:.1f},{event[3]:.1f}\n")
-        except:
-            pass
+        """Queue a light event line for the SD card."""
+        if self.sd_mounted:
+            self._append_sd(_LIGHT_CSV, _EVENT_LINE % (event[0].encode(), event[1].encode(), event[2], event[3]))
+
+    def _append_sd(self, path, data):
+        """Buffer a log line; the file is only written once a sector's worth is queued."""
+        buf = self._sd_buffers.get(path)
+        if buf is None:
+            buf = self._sd_buffers[path] = bytearray()
+        buf.extend(data)
+        if self._sd_flush_due is None:
+            self._sd_flush_due = time.monotonic() + self.SD_FLUSH_INTERVAL
+        # After a failed write, wait for the retry deadline rather than
+        # hitting the card again on every appended line
+        if len(buf) >= self.SD_FLUSH_BYTES and not self._sd_retrying:
+            self._flush_sd(path)
+
+    def _flush_sd(self, path=None):
+        """Write buffered lines for one log file, or all of them. Returns False on a write error."""
+        ok = True
+        attempted = False
+        for p in ([path] if path else list(self._sd_buffers)):
+            buf = self._sd_buffers.get(p)
+            if not buf:
+                continue
+            attempted = True
+            try:
+                f = self._sd_files.get(p)
+                if f is None:
+                    f = self._open_sd_log(p)
+                f.write(buf)
+                f.flush()
+            except OSError as e:
+                print(f"✗ SD card write error: {e}")
+                self._close_sd_log(p)
+                ok = False
+                if len(buf) < self.SD_BUFFER_MAX:
+                    continue  # Keep the batch; the next flush retries it
+                # Cap what a missing card can hold in RAM
+                print(f"✗ Dropped {len(buf)} unwritten bytes for {p}")
+            self._sd_buffers[p] = bytearray()
+        if attempted:
+            self._sd_retrying = not ok
+        if not any(self._sd_buffers.values()):
+            self._sd_flush_due = None
+        elif not ok:
+            # Retry after another interval rather than on every tick
+            self._sd_flush_due = time.monotonic() + self.SD_FLUSH_INTERVAL
+        return ok
+
+    def _open_sd_log(self, path):
+        header = _CSV_HEADERS.get(path)
+        if header:
+            try:
+                with open(path, "r"): pass
+                header = None  # Existing file already has one
+            except OSError:
+                pass
+        f = self._sd_files[path] = open(path, "ab")
+        if header:
+            f.write(header)
+        return f
+
+    def _close_sd_log(self, path):
+        f = self._sd_files.pop(path, None)
+        if f is not None:
+            try:
+                f.close()
+            except OSError:
+                pass
     
     def log_sensor_data(self):
-        """Log current sensor readings to CSV file with timestamp."""
+        """Log a fresh sensor reading to the CSV file with timestamp.
+
+        With the SCD41 present this starts a measurement and returns at once;
+        _check_environment_reading() writes the row when the reading is
+        latched, so the values and the timestamp always belong together.
+        """
+        if not self.sd_mounted:
+            return {"success": False, "error": "SD card not mounted."}
+        if not self.scd41_available:
+            # Nothing to wait for; log the light level with blank environment fields
+            return self._write_data_row(None)
+        if self._env_state != _ENV_MEASURING:
+            error = self._start_measurement()
+            if error:
+                return error
+        self._log_pending = True
+        return {"success": True, "message": "Measuring... data will be logged in about 5 seconds."}
+
+    def _write_data_row(self, env_data):
+        """Write one CSV row from an environment result (or None) and a light reading.
+
+        Rows only come from an explicit "Log to SD" request, so they are
+        flushed at once instead of waiting for a full sector like light events.
+        """
         try:
-            env_data = self.get_environment_reading()
             light_data = self.get_light_reading()
             timestamp = self._get_timestamp()
-            
-            try:
-                with open("/sd/darkbox_data.csv", "r"): pass
-            except:
-                with open("/sd/darkbox_data.csv", "w") as f:
-                    f.write("timestamp,co2_ppm,temp_c,humidity_percent,light_lux\n")
-            
-            with open("/sd/darkbox_data.csv", "a") as f:
-                co2 = env_data.get('co2', '') if env_data.get('success') else ''
-                temp = env_data.get('temp', '') if env_data.get('success') else ''
-                humidity = env_data.get('humidity', '') if env_data.get('success') else ''
-                lux = light_data.get('lux', '') if light_data.get('success') else ''
-                f.write(f"{timestamp},{co2},{temp},{humidity},{lux}\n")
+            env_ok = env_data is not None and env_data['success']
+            lux = light_data['lux'] if light_data['success'] else None
+            self._append_sd(_DATA_CSV, _DATA_LINE % (
+                timestamp.encode(),
+                _csv_field(env_data['co2'] if env_ok else None),
+                _csv_field(env_data['temp'] if env_ok else None),
+                _csv_field(env_data['humidity'] if env_ok else None),
+                _csv_field(lux)
+            ))
+            # Logging was asked for explicitly; write now so the reply is true
+            if not self._flush_sd(_DATA_CSV):
+                return {"success": False, "error": "SD card write failed; will retry"}
             
             return {"success": True, "message": f"Data logged at {timestamp}"}
         except Exception as e:
@@ -291,6 +734,10 @@ class DarkBoxModule(WicdpicoModule):
             if reading['success']: reading['temp_f'] = reading['temp'] * 1.8 + 32
             return Response(request, json.dumps(reading), content_type="application/json")
 
+        @server.route("/darkbox.js", methods=['GET'])
+        def dashboard_script(request: Request):
+            return Response(request, _DARKBOX_JS, content_type="application/javascript", headers=_JS_HEADERS)
+
         @server.route("/darkbox-light", methods=['POST'])
         def light_reading(request: Request):
             global last_activity_time
@@ -309,8 +756,8 @@ class DarkBoxModule(WicdpicoModule):
         def clear_events(request: Request):
             global last_activity_time
             last_activity_time = time.monotonic()
-            count = len(self.light_events)
-            self.light_events = []
+            count = self._events_count
+            self._events_count = 0
             if self.current_event: self.current_event = None
             return Response(request, f"Cleared {count} light events", content_type="text/plain")
         
@@ -336,7 +783,8 @@ class DarkBoxModule(WicdpicoModule):
             if not self.sd_mounted:
                 return Response(request, "SD card not mounted.", content_type="text/plain")
             try:
-                with open("/sd/darkbox_data.csv", "r") as f:
+                self._flush_sd(_DATA_CSV)
+                with open(_DATA_CSV, "r") as f:
                     log_content = f.read()
                 return Response(request, log_content, content_type="text/plain")
             except Exception as e:
@@ -349,7 +797,8 @@ class DarkBoxModule(WicdpicoModule):
             if not self.sd_mounted:
                 return Response(request, "SD card not mounted.", content_type="text/plain")
             try:
-                with open("/sd/light_events.csv", "r") as f:
+                self._flush_sd(_LIGHT_CSV)
+                with open(_LIGHT_CSV, "r") as f:
                     log_content = f.read()
                 return Response(request, log_content, content_type="text/plain")
             except Exception as e:
@@ -411,8 +860,12 @@ class DarkBoxModule(WicdpicoModule):
 
     def update(self):
         """Called from main loop."""
+        if self._env_state == _ENV_MEASURING:
+            self._check_environment_reading()
         self._check_light_events()
         self._check_power_state()
+        if self._sd_flush_due is not None and time.monotonic() >= self._sd_flush_due:
+            self._flush_sd()
 
     def _check_power_state(self):
         voltage = self.get_voltage()
@@ -424,12 +877,16 @@ class DarkBoxModule(WicdpicoModule):
         elif self.power_state != "BATTERY" and voltage < self.BATTERY_THRESHOLD:
             self.power_state = "BATTERY"
             print("Switched to battery power")
+            # Running on battery now; don't leave logged lines only in RAM
+            self._flush_sd()
             self._log_power_event_to_sd("transition", prev_state, self.power_state, voltage)
         # If voltage is between thresholds, hold previous state
 
     def cleanup(self):
-        """Cleanup on shutdown."""
-        pass
+        """Cleanup on shutdown: write buffered log lines and close the log files."""
+        self._flush_sd()
+        for path in list(self._sd_files):
+            self._close_sd_log(path)
 
     def get_dashboard_html(self):
         """Dashboard with cards: environment, light, power, and Wi-Fi hotspot timeout."""
@@ -437,250 +894,15 @@ class DarkBoxModule(WicdpicoModule):
         temp_display = "---" if self.last_temp is None else f"{self.last_temp:.1f}"
         humidity_display = "---" if self.last_humidity is None else f"{self.last_humidity:.1f}"
         lux_display = "---" if self.last_lux is None else f"{self.last_lux:.1f}"
-        
-        power_card = f"""
-        <div class="module" id="power-monitor">
-            <h3>Power Monitoring</h3>
-            <div>
-                <button onclick="fetch('/power-voltage', {{method:'POST'}})
-                    .then(r=>r.text())
-                    .then(v=>document.getElementById('power-voltage').innerText = v + ' V')">
-                    Get Voltage
-                </button>
-                <span id="power-voltage" style="margin-left:1em;">--</span>
-                <button onclick="fetch('/power-source', {{method:'POST'}})
-                    .then(r=>r.text())
-                    .then(s=>document.getElementById('power-state').innerText = s)">
-                    Get Power Source
-                </button>
-                <button onclick="viewPowerLog()">View Log</button>
-                <div>Power Source: <span id="power-state">{self.power_state}</span></div>
-            </div>
-        </div>
-        <script>
-        function viewPowerLog() {{
-            fetch('/power-log')
-                .then(response => response.text())
-                .then(log => {{
-                    alert('Power Event Log:\\n' + log);
-                }})
-                .catch(error => {{
-                    alert('Error reading power log: ' + error.message);
-                }});
-        }}
-        </script>
-        """
 
         # No outer card/wrapper here, just the inner cards
-        return f'''
-        <div class="module">
-            <h3>Environment Sensor</h3>
-            <div style="font-size: 24px; font-weight: bold; text-align: center; padding: 20px; border: 2px solid #007bff; margin: 10px 0;">
-                CO2: <span id="co2-value">{co2_display}</span> ppm
-            </div>
-            <div style="display: flex; justify-content: space-around; text-align: center; margin-bottom: 20px;">
-                <div class="sensor-reading">
-                    <span style="font-weight: bold;">Temperature</span><br>
-                    <span id="temp-value" style="font-size: 1.5em;">{temp_display}</span> C
-                </div>
-                <div class="sensor-reading">
-                    <span style="font-weight: bold;">Humidity</span><br>
-                    <span id="humidity-value" style="font-size: 1.5em;">{humidity_display}</span> %
-                </div>
-            </div>
-            <div class="control-group">
-                <button id="environment-btn" onclick="getEnvironmentReading()">Get Reading</button>
-                <button onclick="window.location.href='/calibration'">Calibration</button>
-                <button id="log-btn" onclick="logData()">Log to SD</button>
-            </div>
-            <p id="environment-status">Ready for measurements</p>
-        </div>
-        <div class="module">
-            <h3>Light Status</h3>
-            <div style="font-size: 24px; font-weight: bold; text-align: center; padding: 20px; border: 2px solid #28a745; margin: 10px 0;">
-                Light: <span id="lux-value">{lux_display}</span> lux
-            </div>
-            <div class="control-group">
-                <button id="light-btn" onclick="getLightReading()">Read Lux</button>
-                <button id="read-light-log-btn" onclick="readLightLogFile()">Read Light Log</button>
-                <button id="clear-events-btn" onclick="clearLightEvents()">Clear Light Events</button>
-            </div>
-            <p id="light-status">Ready for measurements</p>
-        </div>
-        {power_card}
-        <div class="module" id="hotspot-timeout-card">
-          <h3>Wi-Fi Hotspot Timeout</h3>
-          <p id="hotspot-timeout-desc">
-            By default, the Wi-Fi hotspot (AP) will shut down after a period of inactivity for security and power saving.
-            You can disable this timeout to keep the AP open, or manually close it now.
-          </p>
-          <button id="hotspot-btn" onclick="toggleHotspotControl()">Loading...</button>
-          <div id="hotspot-result"></div>
-        </div>
-        <script>
-        function viewPowerLog() {{
-            fetch('/power-log')
-                .then(response => response.text())
-                .then(log => {{
-                    alert('Power Event Log:\\n' + log);
-                }})
-                .catch(error => {{
-                    alert('Error reading power log: ' + error.message);
-                }});
-        }}
-
-        // Wi-Fi Hotspot Timeout Card Logic (from picowide)
-        function updateHotspotButton() {{
-            fetch('/get-hotspot-status')
-                .then(response => response.json())
-                .then(status => {{
-                    const btn = document.getElementById('hotspot-btn');
-                    if (status.timeout_disabled) {{
-                        btn.textContent = 'Close Hotspot';
-                    }} else {{
-                        btn.textContent = 'Keep Hotspot Open';
-                    }}
-                }})
-                .catch(() => {{
-                    document.getElementById('hotspot-btn').textContent = 'Unavailable';
-                }});
-        }}
-
-        function toggleHotspotControl() {{
-            const btn = document.getElementById('hotspot-btn');
-            if (btn.textContent === 'Close Hotspot') {{
-                // Show confirmation before closing
-                if (confirm("Are you sure you want to close the Wi-Fi hotspot? A physical power cycle will be required to restart it.")) {{
-                    fetch('/toggle-hotspot-control', {{ method: 'POST' }})
-                        .then(response => response.text())
-                        .then(result => {{
-                            document.getElementById('hotspot-result').textContent = result;
-                            btn.disabled = true;
-                        }})
-                        .catch(error => {{
-                            document.getElementById('hotspot-result').textContent = 'Error: ' + error.message;
-                        }});
-                }}
-            }} else {{
-                fetch('/toggle-hotspot-control', {{ method: 'POST' }})
-                    .then(response => response.text())
-                    .then(result => {{
-                        btn.textContent = 'Close Hotspot';
-                        document.getElementById('hotspot-result').textContent = 'Automatic timeout disabled. Hotspot will remain open.';
-                    }})
-                    .catch(error => {{
-                        document.getElementById('hotspot-result').textContent = 'Error: ' + error.message;
-                    }});
-            }}
-        }}
-
-        // Initialize button state on page load
-        document.addEventListener('DOMContentLoaded', updateHotspotButton);
-
-        function getEnvironmentReading() {{
-            const btn = document.getElementById('environment-btn');
-            const statusEl = document.getElementById('environment-status');
-            btn.disabled = true;
-            btn.textContent = 'Reading...';
-            statusEl.textContent = 'Measuring... This takes about 5 seconds.';
-            fetch('/darkbox-environment', {{ method: 'POST' }})
-                .then(response => response.json())
-                .then(data => {{
-                    if (data.success) {{
-                        document.getElementById('co2-value').textContent = data.co2;
-                        document.getElementById('temp-value').textContent = data.temp.toFixed(1);
-                        document.getElementById('humidity-value').textContent = data.humidity.toFixed(1);
-                        statusEl.textContent = 'Last reading successful.';
-                    }} else {{
-                        statusEl.textContent = 'Error: ' + data.error;
-                    }}
-                }}).finally(() => {{ btn.disabled = false; btn.textContent = 'Get Reading'; }});
-        }}
-        function getLightReading() {{
-            const btn = document.getElementById('light-btn');
-            const statusEl = document.getElementById('light-status');
-            btn.disabled = true;
-            btn.textContent = 'Reading...';
-            statusEl.textContent = 'Reading light level...';
-            fetch('/darkbox-light', {{ method: 'POST' }})
-                .then(response => response.json())
-                .then(data => {{
-                    if (data.success) {{
-                        document.getElementById('lux-value').textContent = data.lux;
-                        statusEl.textContent = 'Last reading successful.';
-                    }} else {{
-                        statusEl.textContent = 'Error: ' + data.error;
-                    }}
-                }}).finally(() => {{ btn.disabled = false; btn.textContent = 'Read Lux'; }});
-        }}
-        function logData() {{
-            const btn = document.getElementById('log-btn');
-            const statusEl = document.getElementById('environment-status');
-            btn.disabled = true;
-            btn.textContent = 'Logging...';
-            statusEl.textContent = 'Logging data to SD card...';
-            fetch('/darkbox-log', {{ method: 'POST' }})
-                .then(response => response.text())
-                .then(message => {{ statusEl.textContent = message; }})
-                .catch(error => {{ statusEl.textContent = 'Log Error: ' + error.message; }})
-                .finally(() => {{ btn.disabled = false; btn.textContent = 'Log to SD'; }});
-        }}
-
-        function clearLightEvents() {{
-            const btn = document.getElementById('clear-events-btn');
-            btn.disabled = true;
-            btn.textContent = 'Clearing...';
-            fetch('/darkbox-clear-events', {{ method: 'POST' }})
-                .then(response => response.text())
-                .then(message => {{
-                    alert(message);
-                }})
-                .catch(error => {{
-                    alert('Error clearing events: ' + error.message);
-                }})
-                .finally(() => {{
-                    btn.disabled = false;
-                    btn.textContent = 'Clear Light Events';
-                }});
-        }}
-        function readLightLogFile() {{
-            const btn = document.getElementById('read-light-log-btn');
-            btn.disabled = true;
-            btn.textContent = 'Reading...';
-            fetch('/darkbox-read-light-log')
-                .then(response => response.text())
-                .then(log => {{
-                    alert('Light Log File Contents:\\n' + log);
-                }})
-                .catch(error => {{
-                    alert('Error reading light log: ' + error.message);
-                }})
-                .finally(() => {{
-                    btn.disabled = false;
-                    btn.textContent = 'Read Light Log';
-                }});
-        }}
-        function toggleHotspotControl() {{
-            const btn = document.getElementById('hotspot-btn');
-            const resultEl = document.getElementById('hotspot-result');
-            btn.disabled = true;
-            btn.textContent = 'Toggling...';
-            fetch('/toggle-hotspot-control', {{ method: 'POST' }})
-                .then(response => response.text())
-                .then(message => {{
-                    resultEl.textContent = message;
-                    btn.textContent = 'Close Hotspot';
-                }})
-                .catch(error => {{
-                    resultEl.textContent = 'Error: ' + error.message;
-                    btn.textContent = 'Error';
-                }})
-                .finally(() => {{
-                    btn.disabled = false;
-                }});
-        }}
-        </script>
-        '''
+        return _DASHBOARD_HTML.format(
+            co2_display=co2_display,
+            temp_display=temp_display,
+            humidity_display=humidity_display,
+            lux_display=lux_display,
+            power_state=self.power_state
+        )
 
     def get_calibration_html(self):
         """Returns an HTML fragment for the calibration page content."""
@@ -755,9 +977,9 @@ class DarkBoxModule(WicdpicoModule):
             print("✗ SD card not mounted, cannot log data.")
             return False
         try:
-            with open("/sd/darkbox_log.csv", "a") as f:
-                f.write(data + "\n")
-            print("✓ Logged to SD card.")
+            self._append_sd("/sd/darkbox_log.csv", (data + "\n").encode())
+            if _DEBUG:
+                print("✓ Logged to SD card.")
             return True
         except Exception as e:
             print(f"✗ SD card write error: {e}")
@@ -817,13 +1039,4 @@ class DarkBoxModule(WicdpicoModule):
             });
         }
         </script>
-        """
-
-    def update(self):
-        """Called from main loop."""
-        self._check_light_events()
-        self._check_power_state()
-
-    def cleanup(self):
-        """Cleanup on shutdown."""
-        pass
\ No newline at end of file
+        """
\ No newline at end of file
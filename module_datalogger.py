@@ -98,6 +98,7 @@ class DataloggerModule(WicdpicoModule):
             self.log_interval = interval
             self.is_logging = True
             self.last_log_time = time.monotonic() # Start timer immediately
+            self.foundation.register_update(self)
             return Response(request, f"Logging started every {self.log_interval} seconds.", content_type="text/plain")
         except Exception as e:
             return Response(request, f"Error: {e}", content_type="text/plain")
@@ -105,15 +106,19 @@ class DataloggerModule(WicdpicoModule):
     def stop_logging(self, request: Request):
         """Handles the 'Stop Log' button press."""
         self.is_logging = False
+        self.foundation.unregister_update(self)
         return Response(request, "Logging stopped.", content_type="text/plain")
         
     def update(self):
-        """Called continuously by the main loop to handle the timer."""
-        if self.is_logging:
-            now = time.monotonic()
-            if (now - self.last_log_time) > self.log_interval:
-                self._perform_log()
-                self.last_log_time = now
+        """Called by the main loop while logging is active to handle the timer."""
+        if not self.is_logging:
+            # Idle: drop out of the poll until start_logging() re-registers us
+            self.foundation.unregister_update(self)
+            return
+        now = time.monotonic()
+        if (now - self.last_log_time) > self.log_interval:
+            self._perform_log()
+            self.last_log_time = now
 
     def get_dashboard_html(self):
         """Generates the HTML dashboard card for the logger."""
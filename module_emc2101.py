@@ -8,13 +8,78 @@ Implements manual fan speed control according to Adafruit's official documentati
 """
 
 from module_base import WicdpicoModule
-from adafruit_httpserver import Request, Response
+from adafruit_httpserver import Request, Response, SSEResponse, BAD_REQUEST_400
 import json
+import time
 
 import adafruit_emc2101
 
+# /emc2101/status has a fixed schema; last_action is kept JSON-safe when it is set
+_STATUS_TEMPLATE = b'{"speed": %d, "rpm": %d, "last_action": "%s", "available": %s}'
+_JSON_BOOL = (b"false", b"true")
+_NOT_MODIFIED = (304, "Not Modified")
+_OK_BODY = b'{"status": "ok"}'
+_ERROR_BODY = b'{"status": "error"}'
+_SPEED_PREFIX = b'{"speed":'  # JSON.stringify({speed: N}) from the dashboard
+
+def _json_safe(text):
+    return text.replace("\\", "/").replace('"', "'")
+
+# Static dashboard script, served from /emc2101/dashboard.js so browsers cache it
+_DASHBOARD_JS = """
+        function updateFanSpeedLabel(val) {
+            document.getElementById('fan-speed-label').textContent = val + '%';
+        }
+        function setFanSpeed() {
+            var speed = document.getElementById('fan-speed-slider').value;
+            fetch('/emc2101/set_speed', {
+                method: 'POST',
+                headers: {'Content-Type':'application/json'},
+                body: JSON.stringify({speed: parseInt(speed)})
+            }).then(() => getFanStatus());
+        }
+        function turnFanOn() {
+            fetch('/emc2101/turn_on', {method:'POST'}).then(() => getFanStatus());
+        }
+        function turnFanOff() {
+            fetch('/emc2101/turn_off', {method:'POST'}).then(() => getFanStatus());
+        }
+        function getFanStatus() {
+            var key = document.getElementById('emc2101-card').dataset.statusKey;
+            fetch('/status?modules=' + key).then(r => r.json()).then(all => {
+                var data = all[key];
+                document.getElementById('fan-status').textContent = 'Last action: ' + data.last_action;
+                document.getElementById('fan-rpm').textContent = data.rpm;
+                document.getElementById('fan-speed-slider').value = data.speed;
+                updateFanSpeedLabel(data.speed);
+            });
+        }
+        if (window.EventSource) {
+            // RPM is pushed as it changes; speed and last action only change
+            // through this card's own requests, which refresh status themselves
+            new EventSource('/emc2101/rpm_stream').onmessage = function(e) {
+                document.getElementById('fan-rpm').textContent = e.data;
+            };
+        } else {
+            // Poll only while the page is visible
+            setInterval(function() {
+                if (document.visibilityState === 'visible') getFanStatus();
+            }, 2000);
+        }
+        document.addEventListener('visibilitychange', function() {
+            if (document.visibilityState === 'visible') getFanStatus();
+        });
+        getFanStatus();
+"""
+
+_JS_HEADERS = {"Cache-Control": "public, max-age=86400"}
+
 class Emc2101Module(WicdpicoModule):
     VERSION = "1.9"
+    RPM_UPDATE_INTERVAL_S = 2.0
+    RPM_AVERAGE_SAMPLES = 8  # Power of two so the ring index wraps with a mask
+    MAX_PLAUSIBLE_RPM = 6000  # Above this a reading is tach noise, not the fan
+    MAX_RPM_STREAMS = 2  # Each open event stream pins one of the server's few sockets
 
     def __init__(self, foundation):
         super().__init__(foundation)
@@ -22,6 +87,18 @@ class Emc2101Module(WicdpicoModule):
         self._i2c = self._foundation.i2c
         self._fan_speed_percent = 100
         self._last_action = "Initialized"
+        self._fan_rpm = 0
+        self._rpm_ring = [0] * self.RPM_AVERAGE_SAMPLES
+        self._rpm_ring_i = 0
+        self._rpm_ring_count = 0
+        self._rpm_sum = 0
+        self._applied_percent = None  # Last speed successfully written to the chip
+        self._dashboard_html = None
+        self._status_body = None  # Formatted /emc2101/status reply; None when stale
+        self._status_etag = None
+        self._rpm_streams = []
+        self._rpm_interval_ns = int(self.RPM_UPDATE_INTERVAL_S * 1000000000)
+        self._next_rpm_update_ns = 0
         self.available = False
 
         try:
@@ -31,55 +108,158 @@ class Emc2101Module(WicdpicoModule):
             self._last_action = "EMC2101 initialized OK"
             self.set_fan_speed(self._fan_speed_percent)
         except Exception as e:
-            self._last_action = "I2C init error: {}".format(e)
+            self._last_action = _json_safe("I2C init error: {}".format(e))
             self.available = False
 
     def set_fan_speed(self, percent):
         percent = max(0, min(100, int(percent)))
         self._fan_speed_percent = percent
+        self._status_body = None
         if not self.available:
             self._last_action = "EMC2101 not available"
             return
+        if percent == self._applied_percent:
+            return
         try:
             # Set manual fan speed only, as per Adafruit official documentation
             self.emc2101.manual_fan_speed = self._fan_speed_percent
+            self._applied_percent = percent
             self._last_action = "Speed set to {}%".format(self._fan_speed_percent)
         except Exception as e:
-            self._last_action = "I2C error: {}".format(e)
+            self._last_action = _json_safe("I2C error: {}".format(e))
 
     def update(self):
-        pass
+        # Non-blocking: the EMC2101 counts tach pulses itself, so just sample
+        # its RPM register once per interval instead of waiting on the fan.
+        if not self.available:
+            return
+        now = time.monotonic_ns()
+        if now < self._next_rpm_update_ns:
+            return
+        self._next_rpm_update_ns = now + self._rpm_interval_ns
+        try:
+            rpm = int(self.emc2101.fan_speed)
+        except (OSError, RuntimeError):
+            return
+        if rpm > self.MAX_PLAUSIBLE_RPM:
+            # Reject glitch readings (commutation noise, stall overflow) by repeating the current average
+            rpm = self._fan_rpm
+        # Moving average over the last RPM_AVERAGE_SAMPLES readings, kept as a running sum
+        i = self._rpm_ring_i
+        self._rpm_sum += rpm - self._rpm_ring[i]
+        self._rpm_ring[i] = rpm
+        self._rpm_ring_i = (i + 1) & (self.RPM_AVERAGE_SAMPLES - 1)
+        if self._rpm_ring_count < self.RPM_AVERAGE_SAMPLES:
+            self._rpm_ring_count += 1
+        rpm = self._rpm_sum // self._rpm_ring_count
+        if rpm != self._fan_rpm:
+            self._fan_rpm = rpm
+            self._status_body = None
+            if self._rpm_streams:
+                self._push_rpm(rpm)
+
+    def _push_rpm(self, rpm):
+        data = str(rpm)
+        for sse in self._rpm_streams[:]:
+            try:
+                sse.send_event(data)
+            except OSError:
+                # Client went away; drop its stream
+                self._rpm_streams.remove(sse)
+                self._close_stream(sse)
+
+    def _close_stream(self, sse):
+        try:
+            sse.close()
+        except OSError:
+            pass
+
+    def cleanup(self):
+        for sse in self._rpm_streams:
+            self._close_stream(sse)
+        self._rpm_streams = []
+
+    def get_status_dict(self):
+        return {
+            "speed": self._fan_speed_percent,
+            "rpm": self._fan_rpm,
+            "last_action": self._last_action,
+            "available": self.available
+        }
 
     def register_routes(self, server):
-        @server.route("/emc2101/status", methods=["GET"])
-        def get_status(request: Request):
-            status_data = {
-                "speed": self._fan_speed_percent,
-                "last_action": self._last_action,
-                "available": self.available
-            }
-            return Response(request, json.dumps(status_data), content_type="application/json")
-
-        @server.route("/emc2101/set_speed", methods=["POST"])
-        def set_speed(request: Request):
+        if not self.available:
+            # Nothing to serve or poll without the chip; the card reports why
+            self._foundation.startup_print("EMC2101: hardware unavailable, skipping routes")
+            self._foundation.unregister_update(self)
+            return
+        server.route("/emc2101/status", methods=["GET"])(self.handle_status)
+        server.route("/emc2101/set_speed", methods=["POST"])(self.handle_set_speed)
+        server.route("/emc2101/turn_on", methods=["POST"])(self.handle_turn_on)
+        server.route("/emc2101/turn_off", methods=["POST"])(self.handle_turn_off)
+        server.route("/emc2101/dashboard.js", methods=["GET"])(self.handle_dashboard_js)
+        server.route("/emc2101/rpm_stream", methods=["GET"])(self.handle_rpm_stream)
+
+    def handle_status(self, request: Request):
+        # Kept for existing clients; the dashboard polls the batched /status
+        # Reformatted only after set_fan_speed() or a changed RPM average
+        if self._status_body is None:
+            self._status_etag = '"%d-%d-%x"' % (self._fan_speed_percent, self._fan_rpm, hash(self._last_action) & 0xFFFFFFFF)
+            self._status_body = _STATUS_TEMPLATE % (self._fan_speed_percent, self._fan_rpm,
+                                                    self._last_action.encode(), _JSON_BOOL[self.available])
+        etag = self._status_etag
+        if request.headers.get("If-None-Match") == etag:
+            return Response(request, b"", status=_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(request, self._status_body, content_type="application/json", headers={"ETag": etag})
+
+    def handle_set_speed(self, request: Request):
+        # The dashboard always sends exactly {"speed":N}; read N directly and
+        # only fall back to the JSON parser for any other body.
+        body = request.body
+        speed = None
+        if body.startswith(_SPEED_PREFIX) and body.endswith(b"}"):
+            try:
+                speed = int(body[len(_SPEED_PREFIX):-1].decode())
+            except ValueError:
+                pass
+        if speed is None:
             try:
-                data = json.loads(request.body)
-                self.set_fan_speed(data["speed"])
-                return Response(request, '{"status": "ok"}')
-            except Exception:
-                return Response(request, '{"status": "error"}', status=400)
-
-        @server.route("/emc2101/turn_on", methods=["POST"])
-        def turn_on(request: Request):
-            self.set_fan_speed(100)
-            return Response(request, '{"status": "ok"}')
-
-        @server.route("/emc2101/turn_off", methods=["POST"])
-        def turn_off(request: Request):
-            self.set_fan_speed(0)
-            return Response(request, '{"status": "ok"}')
+                speed = json.loads(body)["speed"]
+            except (ValueError, KeyError, TypeError):
+                return Response(request, _ERROR_BODY, status=BAD_REQUEST_400)
+        # Validate up front rather than relying on set_fan_speed() raising
+        if not isinstance(speed, (int, float)) or not 0 <= speed <= 100:
+            return Response(request, _ERROR_BODY, status=BAD_REQUEST_400)
+        self.set_fan_speed(speed)
+        return Response(request, _OK_BODY)
+
+    def handle_turn_on(self, request: Request):
+        self.set_fan_speed(100)
+        return Response(request, _OK_BODY)
+
+    def handle_turn_off(self, request: Request):
+        self.set_fan_speed(0)
+        return Response(request, _OK_BODY)
+
+    def handle_rpm_stream(self, request: Request):
+        # Server-sent events: update() pushes each changed RPM average
+        if len(self._rpm_streams) >= self.MAX_RPM_STREAMS:
+            self._close_stream(self._rpm_streams.pop(0))
+        sse = SSEResponse(request)
+        self._rpm_streams.append(sse)
+        return sse
+
+    def handle_dashboard_js(self, request: Request):
+        return Response(request, _DASHBOARD_JS, content_type="application/javascript", headers=_JS_HEADERS)
 
     def get_dashboard_html(self):
+        # Built once, on first render (status_key is only known after registration).
+        # Live values are filled in by getFanStatus() as soon as the card loads.
+        if self._dashboard_html is None:
+            self._dashboard_html = self._build_dashboard_html()
+        return self._dashboard_html
+
+    def _build_dashboard_html(self):
         if not self.available:
             return """
             <div class="module">
@@ -90,42 +270,16 @@ class Emc2101Module(WicdpicoModule):
             """.format(version=self.VERSION, last_action=self._last_action)
 
         return """
-        <div class="module">
+        <div class="module" id="emc2101-card" data-status-key="{status_key}">
             <h2>EMC2101 Fan Control {version}</h2>
             <div class="control-group">
-                <input type="range" min="0" max="100" value="{speed}" id="fan-speed-slider" oninput="updateFanSpeedLabel(this.value)">
+                <input type="range" min="0" max="100" value="{speed}" id="fan-speed-slider" oninput="updateFanSpeedLabel(this.value)" onchange="setFanSpeed()">
                 <span id="fan-speed-label">{speed}%</span>
-                <button onclick="setFanSpeed()">Set Speed</button>
                 <button onclick="turnFanOn()">On</button>
                 <button onclick="turnFanOff()">Off</button>
             </div>
-            <p id="fan-status">Last action: {last_action}</p>
+            <p><strong>Fan RPM:</strong> <span id="fan-rpm">--</span></p>
+            <p id="fan-status">Last action: --</p>
         </div>
-        <script>
-        function updateFanSpeedLabel(val) {{
-            document.getElementById('fan-speed-label').textContent = val + '%';
-        }}
-        function setFanSpeed() {{
-            var speed = document.getElementById('fan-speed-slider').value;
-            fetch('/emc2101/set_speed', {{
-                method: 'POST',
-                headers: {{'Content-Type':'application/json'}},
-                body: JSON.stringify({{speed: parseInt(speed)}})
-            }}).then(() => getFanStatus());
-        }}
-        function turnFanOn() {{
-            fetch('/emc2101/turn_on', {{method:'POST'}}).then(() => getFanStatus());
-        }}
-        function turnFanOff() {{
-            fetch('/emc2101/turn_off', {{method:'POST'}}).then(() => getFanStatus());
-        }}
-        function getFanStatus() {{
-            fetch('/emc2101/status').then(r => r.json()).then(data => {{
-                document.getElementById('fan-status').textContent = 'Last action: ' + data.last_action;
-                document.getElementById('fan-speed-slider').value = data.speed;
-                updateFanSpeedLabel(data.speed);
-            }});
-        }}
-        getFanStatus();
-        </script>
-        """.format(version=self.VERSION, speed=self._fan_speed_percent, last_action=self._last_action)
\ No newline at end of file
+        <script src="/emc2101/dashboard.js"></script>
+        """.format(version=self.VERSION, speed=self._fan_speed_percent, status_key=self.status_key)
\ No newline at end of file
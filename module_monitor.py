@@ -3,11 +3,16 @@ from adafruit_httpserver import Response
 import os
 import re
 
+_PERCENT_RE = re.compile(r'%([0-9A-Fa-f]{2})')
+
+def _unquote_repl(match):
+    return chr(int(match.group(1), 16))
+
 def url_unquote(s):
     # Minimal URL decode for CircuitPython (handles %XX)
-    def repl(match):
-        return chr(int(match.group(1), 16))
-    return re.sub(r'%([0-9A-Fa-f]{2})', repl, s)
+    if '%' not in s:
+        return s
+    return _PERCENT_RE.sub(_unquote_repl, s)
 
 class MonitorModule(WicdpicoModule):
     def __init__(self, foundation):
@@ -15,9 +20,12 @@ class MonitorModule(WicdpicoModule):
         self.name = "Monitor"
         self.path = "/monitor"
         self.monitor_enabled = False
-        self.console_buffer = []
         self.log_file = "/monitor.log"
         self.buffer_size = 50  # Could be loaded from settings.toml
+        # Fixed ring of console lines; overwrites the oldest line when full
+        self.console_buffer = [None] * self.buffer_size
+        self._console_head = 0
+        self._console_count = 0
 
     def register_routes(self, server):
         server.route(self.path, methods=['GET'])(self.serve_monitor_page)
@@ -40,13 +48,19 @@ class MonitorModule(WicdpicoModule):
             self.console_print("Monitoring started")
         else:
             status = "Monitor is OFF"
-            self.console_buffer = []
+            self._console_count = 0
         return Response(request, status, content_type="text/plain")
 
+    def _console_lines(self):
+        """Returns buffered console lines, oldest first."""
+        size = self.buffer_size
+        start = (self._console_head - self._console_count) % size
+        return [self.console_buffer[(start + i) % size] for i in range(self._console_count)]
+
     def get_console_output(self, request):
-        if self.console_buffer:
-            output = "\n".join(self.console_buffer)
-            self.console_buffer = []
+        if self._console_count:
+            output = "\n".join(self._console_lines())
+            self._console_count = 0
             return Response(request, output, content_type="text/plain")
         else:
             return Response(request, "No new output", content_type="text/plain")
@@ -54,9 +68,9 @@ class MonitorModule(WicdpicoModule):
     def save_console_log(self, request):
         try:
             with open(self.log_file, "a") as f:
-                for line in self.console_buffer:
+                for line in self._console_lines():
                     f.write(line + "\n")
-            self.console_buffer = []
+            self._console_count = 0
             return Response(request, "Log saved", content_type="text/plain")
         except Exception as e:
             return Response(request, f"Error saving log: {e}", content_type="text/plain")
@@ -80,9 +94,10 @@ class MonitorModule(WicdpicoModule):
     def console_print(self, message):
         print(f"[Monitor]: {message}")
         if self.monitor_enabled:
-            self.console_buffer.append(message)
-            if len(self.console_buffer) > self.buffer_size:
-                self.console_buffer = self.console_buffer[-self.buffer_size//2:]
+            self.console_buffer[self._console_head] = message
+            self._console_head = (self._console_head + 1) % self.buffer_size
+            if self._console_count < self.buffer_size:
+                self._console_count += 1
 
     def list_csv_files(self, request):
         # List all .csv files in the /sd directory only
@@ -6,6 +6,91 @@ import time
 import adafruit_scd4x
 from module_base import WicdpicoModule
 from adafruit_httpserver import Request, Response
+from micropython import const
+
+# Static parts of the dashboard card, built once at import. Only
+# the card halves carry per-render fields; the script is served
+# separately from /scd41.js so browsers can cache it.
+_DASHBOARD_STYLE = """
+        <style>
+        .module {
+            border: 2px solid #e5e7eb;
+            border-radius: 8px;
+            padding: 18px 20px;
+            margin: 10px auto;
+            max-width: 420px;
+            background: #fcfcfd;
+            box-shadow: 0 2px 6px rgba(0,0,0,0.04);
+        }
+        .status {
+            border-left: 6px solid;
+            padding-left: 12px;
+            margin-bottom: 10px;
+        }
+        .error-text {
+            color: #dc3545;
+        }
+        #scd41-read-btn {
+            margin-top: 12px;
+            width: 100%;
+            padding: 12px;
+            font-size: 1.05em;
+            border-radius: 4px;
+        }
+        </style>"""
+
+# The card is kept as two halves around the last-reading text, whose age
+# part changes every second and so is added per render, outside the cache.
+_DASHBOARD_CARD_HEAD = """
+        <div class="module">
+            <h2>{name}</h2>
+            <div class="status" style="border-left-color: {status_color};">
+                <strong>Status:</strong> <span style="color: {status_color};">{status_message}</span><br>
+                <strong>Last Reading:</strong> <span id="scd41-last-reading">"""
+
+_DASHBOARD_CARD_TAIL = """</span>
+                {error_html}
+            </div>
+            <p><small>Serial: {sensor_serial}</small></p>
+            <button id="scd41-read-btn" onclick="getSCD41Reading()">Get Fresh Reading (takes 5s)</button>
+        </div>"""
+
+_SCD41_JS = """
+        function getSCD41Reading() {
+            var statusSpan = document.getElementById('scd41-last-reading');
+            var button = document.getElementById('scd41-read-btn');
+            statusSpan.innerHTML = '<strong>Reading... (Please wait 5 seconds)</strong>';
+            button.disabled = true;
+            fetch('/scd41/read', { method: 'POST' })
+                .then(function(response) { return response.text(); })
+                .then(function(result) {
+                    statusSpan.innerHTML = '<strong>' + result + '</strong> (just now)';
+                })
+                .catch(function(error) {
+                    statusSpan.textContent = 'Error: ' + error.message;
+                })
+                .finally(function() {
+                    button.disabled = false;
+                });
+        }
+"""
+
+_SCRIPT_TAG = """
+        <script src="/scd41.js"></script>
+        """
+
+_JS_HEADERS = {"Cache-Control": "public, max-age=86400"}
+
+# Indexed by sensor_available: (unavailable, available)
+_STATUS_COLORS = ("#dc3545", "#28a745")
+
+_SCD4X_MEASURE_SINGLE_SHOT = const(0x219D)
+_MEASURE_TIMEOUT = 6  # Seconds; a single shot takes about 5
+_READY_POLL_INTERVAL = 0.1
+
+def _escape(text):
+    """Minimal HTML escape for exception text shown on the dashboard."""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
 
 class SCD41Module(WicdpicoModule):
     def __init__(self, foundation):
@@ -22,13 +107,17 @@ class SCD41Module(WicdpicoModule):
         self.sensor_serial = "N/A"
         self.status_message = "Initializing..."
         self.last_error = None
+        self._last_error_html = ""
+        self._dash_state = None
+        self._dash_head = None  # Cached card up to where the reading age goes
+        self._dash_tail = None  # ...and from there on
         self._initialize_sensor()
         self.foundation.startup_print("SCD41 module created. Status: '{}'".format(self.status_message))
 
     def _initialize_sensor(self):
         if not self.i2c:
             self.status_message = "Error: I2C Not Available"
-            self.last_error = "Foundation failed to provide I2C bus."
+            self._set_error("Foundation failed to provide I2C bus.")
             self.sensor_available = False
             return
         try:
@@ -39,15 +128,31 @@ class SCD41Module(WicdpicoModule):
             self.status_message = "Ready (Single-Shot Mode)"
         except Exception as e:
             self.sensor_available = False
-            self.last_error = "SCD41 initialization failed: {}".format(e)
+            self._set_error("SCD41 initialization failed: {}".format(e))
             self.status_message = "Error: Not Found"
 
+    def _set_error(self, message):
+        """Records an error along with its escaped dashboard markup."""
+        self.last_error = message
+        self._last_error_html = "<br><span class=\"error-text\"><strong>Error:</strong> {}</span>".format(_escape(message))
+
     def get_sensor_reading(self):
         if not self.sensor_available:
             return {"success": False, "error": "Sensor not available"}
         try:
-            self.scd41.measure_single_shot()
-            time.sleep(5)
+            # Blocks until the reading is in (about 5 s); the datalogger relies on
+            # getting a value back. adafruit_scd4x's measure_single_shot() would
+            # sleep a fixed 5 s itself, so send the command without that delay
+            # and return as soon as the sensor reports data ready.
+            if hasattr(self.scd41, "_send_command"):
+                self.scd41._send_command(_SCD4X_MEASURE_SINGLE_SHOT, cmd_delay=0)
+                deadline = time.monotonic() + _MEASURE_TIMEOUT
+                while not self.scd41.data_ready:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError("Measurement timed out")
+                    time.sleep(_READY_POLL_INTERVAL)
+            else:
+                self.scd41.measure_single_shot()  # Unknown driver version; sleeps 5 s itself
             co2_ppm = self.scd41.CO2
             temp_c = round(self.scd41.temperature, 1)
             humidity = round(self.scd41.relative_humidity, 1)
@@ -57,7 +162,7 @@ class SCD41Module(WicdpicoModule):
             self.last_reading_time = time.monotonic()
             return { "success": True, "co2": self.last_co2, "temperature": temp_c, "humidity": humidity }
         except Exception as e:
-            self.last_error = "Reading failed: {}".format(e)
+            self._set_error("Reading failed: {}".format(e))
             return {"success": False, "error": self.last_error}
 
     def set_altitude(self, altitude):
@@ -69,9 +174,6 @@ class SCD41Module(WicdpicoModule):
         except Exception as e:
             return False, str(e)
 
-    def update(self):
-        pass
-
     def register_routes(self, server):
         @server.route("/scd41/read", methods=['POST'])
         def read_route(request: Request):
@@ -84,79 +186,43 @@ class SCD41Module(WicdpicoModule):
             else:
                 error_msg = result_dict.get('error', 'Unknown error')
                 return Response(request, "Failed: {}".format(error_msg), content_type="text/plain")
-        self.foundation.startup_print("SCD41 route '/scd41/read' registered.")
+
+        @server.route("/scd41.js", methods=['GET'])
+        def script_route(request: Request):
+            return Response(request, _SCD41_JS, content_type="application/javascript", headers=_JS_HEADERS)
+        self.foundation.startup_print("SCD41 routes '/scd41/read' and '/scd41.js' registered.")
 
     def get_dashboard_html(self):
-        status_color = "#28a745" if self.sensor_available else "#dc3545"
-        error_html = "<br><span class=\"error-text\"><strong>Error:</strong> {}</span>".format(self.last_error) if self.last_error else ""
-        if self.last_co2 is not None:
-            age = time.monotonic() - self.last_reading_time
-            last_reading_text = "<strong>{} ppm</strong>, {}°C, {}% RH ({}s ago)".format(
-                self.last_co2, self.last_temp, self.last_humidity, int(age)
-            )
-        else:
-            last_reading_text = "No readings yet"
-        return """
-        <style>
-        .module {{
-            border: 2px solid #e5e7eb;
-            border-radius: 8px;
-            padding: 18px 20px;
-            margin: 10px auto;
-            max-width: 420px;
-            background: #fcfcfd;
-            box-shadow: 0 2px 6px rgba(0,0,0,0.04);
-        }}
-        .status {{
-            border-left: 6px solid {status_color};
-            padding-left: 12px;
-            margin-bottom: 10px;
-        }}
-        .error-text {{
-            color: #dc3545;
-        }}
-        #scd41-read-btn {{
-            margin-top: 12px;
-            width: 100%;
-            padding: 12px;
-            font-size: 1.05em;
-            border-radius: 4px;
-        }}
-        </style>
-        <div class="module">
-            <h2>{name}</h2>
-            <div class="status">
-                <strong>Status:</strong> <span style="color: {status_color};">{status_message}</span><br>
-                <strong>Last Reading:</strong> <span id="scd41-last-reading">{last_reading_text}</span>
-                {error_html}
-            </div>
-            <p><small>Serial: {sensor_serial}</small></p>
-            <button id="scd41-read-btn" onclick="getSCD41Reading()">Get Fresh Reading (takes 5s)</button>
-        </div>
-        <script>
-        function getSCD41Reading() {{
-            var statusSpan = document.getElementById('scd41-last-reading');
-            var button = document.getElementById('scd41-read-btn');
-            statusSpan.innerHTML = '<strong>Reading... (Please wait 5 seconds)</strong>';
-            button.disabled = true;
-            fetch('/scd41/read', {{ method: 'POST' }})
-                .then(function(response) {{ return response.text(); }})
-                .then(function(result) {{
-                    statusSpan.innerHTML = '<strong>' + result + '</strong> (just now)';
-                }})
-                .catch(function(error) {{
-                    statusSpan.textContent = 'Error: ' + error.message;
-                }})
-                .finally(function() {{
-                    button.disabled = false;
-                }});
-        }}
-        </script>
-        """.format(
-            status_color=status_color,
+        # Bind each field once; the cache key and the render both use them.
+        # The reading age changes every second, so it is kept out of the cache
+        # and added between the cached halves on each render.
+        available = self.sensor_available
+        status_message = self.status_message
+        last_error = self.last_error
+        co2 = self.last_co2
+        state = (available, status_message, last_error, co2, self.last_temp, self.last_humidity, self.last_reading_time)
+        if state != self._dash_state:
+            self._build_dashboard_html(state)
+            self._dash_state = state
+        if co2 is None:
+            return self._dash_head + self._dash_tail
+        return self._dash_head + str(int(time.monotonic() - state[6])) + self._dash_tail
+
+    def _build_dashboard_html(self, state):
+        available, status_message, last_error, co2, temp, humidity, _ = state
+        head = _DASHBOARD_STYLE + _DASHBOARD_CARD_HEAD.format(
+            status_color=_STATUS_COLORS[available],
             name=self.name,
-            status_message=self.status_message,
-            last_reading_text=last_reading_text,
-            error_html=error_html,
+            status_message=status_message
+        )
+        tail = _DASHBOARD_CARD_TAIL.format(
+            error_html=self._last_error_html,
             sensor_serial=self.sensor_serial
-        )
\ No newline at end of file
+        ) + _SCRIPT_TAG
+        if co2 is not None:
+            head += "<strong>{} ppm</strong>, {}°C, {}% RH (".format(co2, temp, humidity)
+            tail = "s ago)" + tail
+        else:
+            head += "No readings yet"
+        self._dash_head = head
+        self._dash_tail = tail